@@ -106,15 +106,13 @@ def canon_binomial(s: str) -> str:
     parts = s.strip().split()
     return " ".join(parts[:2]) if len(parts) >= 2 else s.strip()
 
-def _get(row: dict, *keys: str) -> Optional[str]:
-    for k in keys:
-        if k in row and row[k] is not None:
-            return str(row[k])
-    low = {k.lower(): k for k in row.keys()}
-    for k in keys:
-        kk = low.get(k.lower())
-        if kk and row[kk] is not None:
-            return str(row[kk])
+def resolve_alias(fieldnames: List[str], *aliases: str) -> Optional[str]:
+    """First of `aliases` naming a column in `fieldnames` (case-insensitively), else None.
+    Resolved once per file so row loops do a single dict lookup instead of probing aliases."""
+    low = {n.lower() for n in fieldnames}
+    for a in aliases:
+        if a.lower() in low:
+            return a
     return None
 
 def _pick_score(name: str, preferred: Optional[bool], lang: str, country: Optional[str]) -> int:
@@ -140,6 +138,10 @@ def _is_blank(x: Optional[str]) -> bool:
     return x is None or (isinstance(x, str) and x.strip() == "")
 
 # ---------------- TSV reader ----------------
+def tsv_header(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        return f.readline().rstrip("\r\n").split("\t")
+
 def iter_tsv_select(path: str, wanted: list[str]):
     with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
         header = f.readline()
@@ -249,29 +251,31 @@ def enrich_from_backbone(
         print("ERROR: Taxon.tsv not found in", dir_path); return
 
     name_to_keys: Dict[str, List[int]] = defaultdict(list)
-    wanted_taxon_cols = [
-        "kingdom",
-        "taxonRank", "rank",
-        "canonicalName", "scientificName",
-        "taxonID", "taxonId", "usageID", "usageKey",
-    ]
+    # missing columns resolve to None, and row.get(None, "") is ""
+    taxon_header = tsv_header(taxon_path)
+    kingdom_col = resolve_alias(taxon_header, "kingdom")
+    rank_col = resolve_alias(taxon_header, "taxonRank", "rank")
+    canonical_col = resolve_alias(taxon_header, "canonicalName")
+    sci_col = resolve_alias(taxon_header, "scientificName")
+    key_col = resolve_alias(taxon_header, "taxonID", "taxonId", "usageID", "usageKey")
+    wanted_taxon_cols = [c for c in (kingdom_col, rank_col, canonical_col, sci_col, key_col) if c]
     for row in iter_tsv_select(taxon_path, wanted_taxon_cols):
-        kingdom = (_get(row, "kingdom") or "").strip().lower()
+        kingdom = row.get(kingdom_col, "").strip().lower()
         if kingdom and kingdom != "plantae":
             continue
 
-        rank = (_get(row, "taxonRank", "rank") or "").strip().lower()
+        rank = row.get(rank_col, "").strip().lower()
         if rank != "species":
             continue
 
-        sci = (_get(row, "canonicalName") or _get(row, "scientificName") or "").strip()
+        sci = (row.get(canonical_col, "") or row.get(sci_col, "")).strip()
         if not sci:
             continue
         cn = canon_binomial(sci)
         if cn not in need_names:
             continue
 
-        row_key = _get(row, "taxonID", "taxonId", "usageID", "usageKey")
+        row_key = row.get(key_col, "")
         if not row_key:
             continue
         try:
@@ -306,16 +310,21 @@ def enrich_from_backbone(
     best_by_key: Dict[int, Tuple[int, str, str]] = {}       # allowed langs
     best_any_by_key: Dict[int, Tuple[int, str, str]] = {}   # ANY lang (fallback)
 
-    wanted_vern_cols = [
-        "taxonID", "taxonId", "usageID", "usageKey",
-        "vernacularName", "vernacularname",
-        "language", "languageCode",
-        "countryCode", "country",
-        "isPreferredName", "preferred", "isPreferred",
-    ]
+    vern_header = tsv_header(vern_path)
+    key_col = resolve_alias(vern_header, "taxonID", "taxonId", "usageID", "usageKey")
+    name_col = resolve_alias(vern_header, "vernacularName", "vernacularname")
+    lang_col = resolve_alias(vern_header, "language", "languageCode")
+    country_col = resolve_alias(vern_header, "countryCode", "country")
+    pref_col = resolve_alias(vern_header, "isPreferredName", "preferred", "isPreferred")
+    wanted_vern_cols = [c for c in (key_col, name_col, lang_col, country_col, pref_col) if c]
+    # test the raw id string first so int() only runs for target rows
+    target_tids = {str(k) for k in target_keys}
     for row in iter_tsv_select(vern_path, wanted_vern_cols):
-        tid = _get(row, "taxonID", "taxonId", "usageID", "usageKey")
-        if not tid: continue
+        tid = row.get(key_col, "")
+        if tid not in target_tids:
+            # only a non-canonical spelling (" 12", "012") could still be a target
+            if not tid or (tid.isascii() and tid.isdigit() and tid[0] != "0"):
+                continue
         try:
             k = int(tid)
         except ValueError:
@@ -323,12 +332,12 @@ def enrich_from_backbone(
         if k not in target_keys:
             continue
 
-        name = (_get(row, "vernacularName", "vernacularname") or "").strip()
+        name = row.get(name_col, "").strip()
         if not name: continue
 
-        lang = (_get(row, "language", "languageCode") or "").strip().lower()
-        country = (_get(row, "countryCode", "country") or "").strip()
-        pref_s = (_get(row, "isPreferredName", "preferred", "isPreferred") or "").strip().lower()
+        lang = row.get(lang_col, "").strip().lower()
+        country = row.get(country_col, "").strip()
+        pref_s = row.get(pref_col, "").strip().lower()
         preferred = (pref_s in ("true","t","1","yes","y"))
 
         # score ANY-language for fallback
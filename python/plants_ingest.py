@@ -1,6 +1,7 @@
 #!/usr/bin/env python
-import argparse, csv, gzip, io, json, os, sys, time
+import argparse, csv, gzip, io, json, os, sqlite3, sys, tempfile, time
 from typing import Iterable, Dict, Any, Optional, Tuple
+from urllib.parse import quote
 import requests
 from dotenv import load_dotenv
 from tqdm import tqdm
@@ -36,11 +37,25 @@ GBIF_VERN_LIMIT  = int(os.getenv("GBIF_VERN_LIMIT",  "400"))   # concurrent /ver
 GBIF_RETRIES = int(os.getenv("GBIF_RETRIES", "3"))
 GBIF_SYNONYM_LIMIT = int(os.getenv("GBIF_SYNONYM_LIMIT", "8"))  # max scientific synonyms to try per plant
 SUPABASE_IN_MAX = int(os.getenv("SUPABASE_IN_MAX", "80"))  # keep URL short; 50–100 is usually safe
+SUPABASE_URL_MAX = int(os.getenv("SUPABASE_URL_MAX", "8000"))  # est. bytes; PostgREST/proxy request-line limit is ~8 KB
+SUPABASE_MAX_ROWS = int(os.getenv("SUPABASE_MAX_ROWS", "1000"))  # PostgREST max-rows; longer results are cut off
 USDA_BATCH = int(os.getenv("USDA_BATCH", "2000"))          # rows per batch for DB fanout
 USDA_CONCURRENCY = int(os.getenv("USDA_CONCURRENCY", "8")) # threads for DB upserts
 USDA_LOCALE = os.getenv("USDA_LOCALE", "en-US")
 USDA_CREATE_MISSING = os.getenv("USDA_CREATE_MISSING", "0") == "1"  # create plants for USDA-only scis?
 USDA_SET_DISPLAY = os.getenv("USDA_SET_DISPLAY", "0") == "1"        # set plant_name when == scientific?
+# Exact + scientific-synonym name resolution in one round trip, paged in SQL (stable order)
+# so no page is cut off by PostgREST max-rows:
+#   CREATE FUNCTION resolve_names_to_plant_ids(names text[], page_size int DEFAULT NULL, page_offset int DEFAULT 0)
+#   RETURNS TABLE(name text, plant_id uuid, source text) LANGUAGE sql STABLE AS $$
+#     SELECT r.* FROM (
+#       SELECT p.plant_scientific_name, p.id, 'exact' FROM plants p WHERE p.plant_scientific_name = ANY(names)
+#       UNION ALL
+#       SELECT ps.name, ps.plant_id, 'syn' FROM plant_synonyms ps WHERE ps.kind = 'scientific' AND ps.name = ANY(names)
+#     ) r ORDER BY 1, 3, 2 LIMIT page_size OFFSET page_offset
+#   $$;
+USDA_RESOLVE_RPC = os.getenv("USDA_RESOLVE_RPC", "resolve_names_to_plant_ids")  # "" → two-step IN() lookups
+USDA_DELIM = os.getenv("USDA_DELIM", ",").replace("\\t", "\t")   # PLANTS download is comma-separated; "\t" for TSV exports
 WIKIDATA_SPARQL = "https://query.wikidata.org/sparql"
 WIKIDATA_BATCH = int(os.getenv("WIKIDATA_BATCH", "200"))         # GBIF keys per SPARQL query
 WIKIDATA_CONCURRENCY = int(os.getenv("WIKIDATA_CONCURRENCY", "3"))  # keep low; be nice to WDQS
@@ -57,6 +72,23 @@ ITIS_CONCURRENCY = int(os.getenv("ITIS_CONCURRENCY", "64"))
 ITIS_MAX_CONN    = int(os.getenv("ITIS_MAX_CONN", "256"))
 ITIS_RETRIES     = int(os.getenv("ITIS_RETRIES", "3"))
 ITIS_SET_DISPLAY = os.getenv("ITIS_SET_DISPLAY", "1") == "1"  # only if display==scientific
+# Server-side "display == scientific" filter used by the Wikidata/iNat/ITIS enrichers:
+#   CREATE VIEW plants_needing_common AS
+#     SELECT id, plant_scientific_name, plant_name, gbif_usage_key FROM plants
+#     WHERE plant_name <> '' AND btrim(plant_name, E' \t\r\n') = btrim(plant_scientific_name, E' \t\r\n');
+PLANTS_NEEDING_COMMON = os.getenv("PLANTS_NEEDING_COMMON_VIEW", "plants_needing_common")
+# Columnar synonym upsert (one INSERT ... SELECT unnest(...) per batch). "" → plain PostgREST upsert.
+#   CREATE FUNCTION bulk_upsert_synonyms(plant_ids uuid[], names text[], kinds text[], locales text[])
+#   RETURNS void LANGUAGE sql AS $$
+#     INSERT INTO plant_synonyms (plant_id, name, kind, locale)
+#     SELECT * FROM unnest(plant_ids, names, kinds, locales)
+#     ON CONFLICT DO NOTHING
+#   $$;
+SYN_BULK_RPC = os.getenv("SYN_BULK_RPC", "bulk_upsert_synonyms")
+SYN_RPC_BATCH = int(os.getenv("SYN_RPC_BATCH", "5000"))
+SYN_RPC_RETRIES = int(os.getenv("SYN_RPC_RETRIES", "3"))  # per batch, on timeouts/5xx
+NAME_CACHE_PATH = os.getenv("PLANTER_CACHE", os.path.join(tempfile.gettempdir(), "planter_name_cache.sqlite"))  # "" disables
+NAME_CACHE_TTL = int(os.getenv("PLANTER_CACHE_TTL_DAYS", "30")) * 86400
 
 # ---------- Supabase ----------
 def get_sb() -> Client:
@@ -211,6 +243,60 @@ def _new_sb() -> Client:
     load_dotenv()
     return create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE"])
 
+def _fetch_plants_page(sb: Client, cols: str, after_id: Optional[str], limit: int,
+                       table: str = "plants") -> list[dict]:
+    """
+    Keyset page over plants (or a view of it) ordered by id: rows with id > after_id
+    (None = from the start). Cost per page is O(limit) instead of the O(offset) scan
+    that .range() forces. Pairs with a btree on plants(id) — for the view below, the partial index
+      CREATE INDEX plants_display_eq_sci ON plants(id)
+        WHERE plant_name <> '' AND btrim(plant_name, E' \\t\\r\\n') = btrim(plant_scientific_name, E' \\t\\r\\n');
+    """
+    q = sb.table(table).select(cols).order("id", desc=False).limit(limit)
+    if after_id:
+        q = q.gt("id", after_id)
+    res = q.execute()
+    return getattr(res, "data", None) or []
+
+def _iter_plant_pages(cols: str, batch_size: int, table: str = "plants") -> Iterable[list[dict]]:
+    """
+    Yield keyset pages from _fetch_plants_page. Page N+1 is fetched on a background thread
+    (with its own client) while the caller processes page N, hiding one DB round trip per page.
+    Prefetching is safe because the cursor only depends on page N's last id.
+    """
+    sb_pf = _new_sb()
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        fut = ex.submit(_fetch_plants_page, sb_pf, cols, None, batch_size, table)
+        while True:
+            rows = fut.result()
+            if not rows:
+                return
+            fut = ex.submit(_fetch_plants_page, sb_pf, cols, rows[-1]["id"], batch_size, table)
+            yield rows
+
+def _display_is_scientific(r: dict) -> bool:
+    sci, disp = r.get("plant_scientific_name"), r.get("plant_name")
+    return bool(sci and disp and sci.strip() == disp.strip())
+
+def _iter_plants_needing_common(cols: str, batch_size: int) -> Iterable[list[dict]]:
+    """
+    Non-empty pages of plants whose display name still equals the scientific name, paged
+    from the PLANTS_NEEDING_COMMON view (or from plants if the view isn't there). The filter
+    is re-applied client-side either way, so pointing the setting at plants is still safe.
+    """
+    pages = _iter_plant_pages(cols, batch_size, table=PLANTS_NEEDING_COMMON)
+    try:
+        rows = next(pages, None)
+    except Exception as e:
+        print(f"WARN: {PLANTS_NEEDING_COMMON} view unavailable; paging plants instead ->", repr(e))
+        pages = _iter_plant_pages(cols, batch_size)
+        rows = next(pages, None)
+    while rows is not None:
+        need = [r for r in rows if _display_is_scientific(r)]
+        if need:
+            yield need
+        rows = next(pages, None)
+
 def _fetch_scientific_synonyms(
     sb: Client,
     plant_ids: list[str],
@@ -307,6 +393,45 @@ def _escape_q(s: str) -> str:
     # scientific names rarely contain quotes, but be safe
     return s.replace('"', '\\"')
 
+# ---------- Name-resolution cache (iNat/ITIS, persists across runs) ----------
+_name_cache_db = None   # sqlite3.Connection once opened; False if unavailable
+_CACHE_MISS = object()
+
+def _name_cache() -> Optional[sqlite3.Connection]:
+    global _name_cache_db
+    if _name_cache_db is None:
+        _name_cache_db = False
+        if NAME_CACHE_PATH:
+            try:
+                db = sqlite3.connect(NAME_CACHE_PATH, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=OFF")  # it's a cache; losing the tail on a crash is fine
+                db.execute("CREATE TABLE IF NOT EXISTS name_cache ("
+                           "source TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, expires REAL NOT NULL, "
+                           "PRIMARY KEY (source, name))")
+                _name_cache_db = db
+            except sqlite3.Error as e:
+                print("WARN: name cache disabled ->", repr(e))
+    return _name_cache_db or None
+
+def _name_cache_get(source: str, name: str):
+    """Return the cached JSON value for (source, name), or _CACHE_MISS if absent/expired."""
+    db = _name_cache()
+    if db is None:
+        return _CACHE_MISS
+    row = db.execute("SELECT value, expires FROM name_cache WHERE source = ? AND name = ?", (source, name)).fetchone()
+    if not row or row[1] < time.time():
+        return _CACHE_MISS
+    return json.loads(row[0])
+
+def _name_cache_set(source: str, name: str, value) -> None:
+    """Store a *definitive* answer (including "no match"); transient failures must not be cached."""
+    db = _name_cache()
+    if db is None:
+        return
+    db.execute("INSERT OR REPLACE INTO name_cache (source, name, value, expires) VALUES (?, ?, ?, ?)",
+               (source, name, json.dumps(value), time.time() + NAME_CACHE_TTL))
+
 async def _inat_get(client: httpx.AsyncClient, path: str, params: dict, tries: int = INAT_RETRIES):
     url = f"{INAT_BASE}{path}"
     for i in range(tries):
@@ -350,6 +475,9 @@ async def _inat_match_name(client: httpx.AsyncClient, name: str) -> Optional[dic
     """
     if not name:
         return None
+    cached = _name_cache_get("inat_taxon", name)
+    if cached is not _CACHE_MISS:
+        return cached
     js = await _inat_get(client, "/taxa", {"name": name, "locale": "en"})
     if not js or not isinstance(js, dict):
         return None
@@ -357,13 +485,20 @@ async def _inat_match_name(client: httpx.AsyncClient, name: str) -> Optional[dic
     if not results:
         # Try a looser query if exact didn't hit
         js2 = await _inat_get(client, "/taxa", {"q": name, "locale": "en"})
-        results = (js2 or {}).get("results") or []
+        if not js2 or not isinstance(js2, dict):
+            return None
+        results = js2.get("results") or []
         if not results:
+            _name_cache_set("inat_taxon", name, None)
             return None
     # Prefer exact scientific name matches on 'name'
     name_low = name.strip().lower()
     exact = [t for t in results if (t.get("name") or "").strip().lower() == name_low]
-    return (exact[0] if exact else results[0])
+    pick = exact[0] if exact else results[0]
+    # only keep what _inat_pick_en_common reads so cache rows stay small
+    slim = {k: pick.get(k) for k in ("id", "name", "preferred_common_name", "names", "taxon_names") if k in pick}
+    _name_cache_set("inat_taxon", name, slim)
+    return slim
 
 def _canon_binomial_only(s: str) -> str:
     # strip hybrid marks and infraspecific/authors → keep "Genus species"
@@ -401,18 +536,28 @@ async def _itis_search_tsn(client, name: str) -> Optional[str]:
 
     if not name:
         return None
+    cached = _name_cache_get("itis_tsn", name)
+    if cached is not _CACHE_MISS:
+        return cached
 
     # 1) try full string
     js = await _itis_get(client, "searchByScientificName", {"srchKey": name})
-    results = (js or {}).get("scientificNames") or []
+    if js is None:
+        return None  # transient failure; don't cache
+    results = js.get("scientificNames") or []
 
     # 2) fallback: binomial only
     if not results:
         bino = _canon_bino(name)
         if bino and bino != name:
             js2 = await _itis_get(client, "searchByScientificName", {"srchKey": bino})
-            results = (js2 or {}).get("scientificNames") or []
+            if js2 is None:
+                return None
+            results = js2.get("scientificNames") or []
+    # ITIS can return [null] rather than [] for no hits
+    results = [r for r in results if r]
     if not results:
+        _name_cache_set("itis_tsn", name, None)
         return None
 
     target_bino = _canon_bino(name).lower()
@@ -428,18 +573,25 @@ async def _itis_search_tsn(client, name: str) -> Optional[str]:
     exact = [r for r in results if _canon_bino(_combined(r)).lower() == target_bino]
     pick = exact[0] if exact else results[0]
 
-    tsn = str(pick.get("tsn") or "").strip()
-    return tsn or None
+    tsn = str(pick.get("tsn") or "").strip() or None
+    _name_cache_set("itis_tsn", name, tsn)
+    return tsn
 
 async def _itis_common_en(client, tsn: str) -> list[str]:
     """Return English common names for a TSN."""
+    cached = _name_cache_get("itis_common", tsn)
+    if cached is not _CACHE_MISS:
+        return cached
     js = await _itis_get(client, "getCommonNamesForTSN", {"tsn": tsn})
-    rows = (js or {}).get("commonNames") or []
+    if js is None:
+        return []  # transient failure; don't cache
+    rows = js.get("commonNames") or []
     out = []
     for r in rows:
-        if (r.get("language") or "").lower().startswith("english"):
+        if r and (r.get("language") or "").lower().startswith("english"):
             nm = (r.get("commonName") or "").strip()
             if nm: out.append(nm)
+    _name_cache_set("itis_common", tsn, out)
     return out
 
 def _pick_preferred_en_common_from_wikidata(names: list[str]) -> Optional[str]:
@@ -503,43 +655,91 @@ def _parallel_fetch_ids(scis: list[str], batch: int = WFO_BATCH, workers: int =
                 print("WARN: id fetch batch failed ->", repr(e))
     return out
 
-def _parallel_upsert_synonyms(rows: list[dict], batch: int = WFO_BATCH, workers: int = WFO_CONCURRENCY) -> int:
+_syn_rpc_ok = {"ok": bool(SYN_BULK_RPC)}  # flipped off (for the whole run) if the RPC is missing
+
+def _rpc_missing(e: Exception) -> bool:
+    """True if a PostgREST RPC error means the function doesn't exist (PGRST202 / 404)."""
+    msg = str(e)
+    return getattr(e, "code", None) == "PGRST202" or "PGRST202" in msg or "404" in msg
+
+def _parallel_upsert_synonym_columns(
+    plant_ids: list[str],
+    names: list[str],
+    kinds: list[str],
+    locales: list[Optional[str]],
+    batch: int = SYN_RPC_BATCH,
+    workers: int = WFO_CONCURRENCY,
+) -> int:
     """
-    rows: [{"plant_id":..., "name":..., "kind":"scientific", "locale":None}, ...]
-    Uses upsert(ignore_duplicates) so we can blast rows without pre-fetching.
+    Columnar synonym upsert: four parallel arrays instead of a list of dicts.
+    Each batch is one bulk_upsert_synonyms RPC (INSERT ... SELECT unnest ... ON CONFLICT DO NOTHING),
+    falling back to a PostgREST upsert(ignore_duplicates) if the RPC isn't installed.
     Returns number of rows sent (duplicates silently ignored by DB).
     """
-    # light client-side de-dupe inside each batch to cut down conflicts
-    def job(batch_rows):
+    def job(lo: int, hi: int) -> int:
         sb2 = _new_sb()
         # de-dupe within batch on (plant_id, lower(name), kind, locale or "")
         seen = set()
-        unique_rows = []
-        for r in batch_rows:
-            key = (r["plant_id"], (r["name"] or "").lower(), r.get("kind") or "scientific", r.get("locale") or "")
-            if key in seen: 
+        b_ids, b_names, b_kinds, b_locales = [], [], [], []
+        for j in range(lo, hi):
+            key = (plant_ids[j], (names[j] or "").lower(), kinds[j] or "scientific", locales[j] or "")
+            if key in seen:
                 continue
             seen.add(key)
-            unique_rows.append(r)
-        if not unique_rows:
+            b_ids.append(plant_ids[j]); b_names.append(names[j])
+            b_kinds.append(kinds[j]); b_locales.append(locales[j])
+        if not b_ids:
             return 0
+        for attempt in range(SYN_RPC_RETRIES):
+            if not _syn_rpc_ok["ok"]:
+                break
+            try:
+                sb2.rpc(SYN_BULK_RPC, {
+                    "plant_ids": b_ids, "names": b_names, "kinds": b_kinds, "locales": b_locales,
+                }).execute()
+                return len(b_ids)
+            except Exception as e:
+                if _rpc_missing(e):
+                    if _syn_rpc_ok["ok"]:
+                        print(f"WARN: {SYN_BULK_RPC} RPC missing; falling back to row upserts ->", repr(e))
+                    _syn_rpc_ok["ok"] = False
+                elif attempt == SYN_RPC_RETRIES - 1:
+                    raise  # transient errors (timeouts, 5xx) keep the RPC on for other batches
+                else:
+                    backoff_sleep(attempt)
         sb2.table("plant_synonyms").upsert(
-            unique_rows,
+            [{"plant_id": a, "name": b, "kind": c, "locale": d}
+             for a, b, c, d in zip(b_ids, b_names, b_kinds, b_locales)],
             ignore_duplicates=True,      # hits your unique index; conflicts are skipped
             returning="minimal"
         ).execute()
-        return len(unique_rows)
+        return len(b_ids)
 
-    chunks = [rows[i:i+batch] for i in range(0, len(rows), batch)]
+    n = len(plant_ids)
+    bounds = [(i, min(i + batch, n)) for i in range(0, n, batch)]
     sent = 0
     with ThreadPoolExecutor(max_workers=workers) as ex:
-        for fut in tqdm(as_completed([ex.submit(job, c) for c in chunks]), total=len(chunks), desc="Upserting synonyms", unit="batch"):
+        for fut in tqdm(as_completed([ex.submit(job, lo, hi) for lo, hi in bounds]), total=len(bounds), desc="Upserting synonyms", unit="batch"):
             try:
                 sent += fut.result()
             except Exception as e:
                 print("WARN: synonym upsert batch failed ->", repr(e))
     return sent
 
+def _parallel_upsert_synonyms(rows: list[dict], batch: int = WFO_BATCH, workers: int = WFO_CONCURRENCY) -> int:
+    """
+    rows: [{"plant_id":..., "name":..., "kind":"scientific", "locale":None}, ...]
+    Row-dict front end for _parallel_upsert_synonym_columns.
+    Returns number of rows sent (duplicates silently ignored by DB).
+    """
+    return _parallel_upsert_synonym_columns(
+        [r["plant_id"] for r in rows],
+        [r["name"] for r in rows],
+        [r.get("kind") for r in rows],
+        [r.get("locale") for r in rows],
+        batch=batch, workers=workers,
+    )
+
 def seed_wfo_bundle(sb: Client, path: str, limit: Optional[int] = None):
     """
     Ingest from the WFO bundle (taxon.tsv + name.tsv + synonym.tsv).
@@ -740,7 +940,7 @@ def seed_wfo_bundle(sb: Client, path: str, limit: Optional[int] = None):
         nm = (syn_name or "").strip()
         if not nm:
             continue
-        key = (pid, nm.lower(), "scientific", "")
+        key = (pid, nm.lower())
         if key in seen:
             continue
         seen.add(key)
@@ -1452,6 +1652,11 @@ def _safe_in_select(
 ) -> list[dict]:
     """
     Robust IN(...) paging that halves the batch on 400/414 (URL too big) and retries.
+    After a run of successes the batch doubles again (up to twice start_size), so one
+    transient failure doesn't pin the rest of the run at a tiny size, but never back up to
+    a size that has failed. Chunks whose estimated URL would exceed SUPABASE_URL_MAX (the
+    server's request-line limit, well above what start_size names normally take) are
+    trimmed before sending.
     extra_filters: e.g. [("eq","kind","scientific")]
     """
     if start_size is None:
@@ -1459,9 +1664,21 @@ def _safe_in_select(
     out: list[dict] = []
     vals = [v for v in values if v]
     i, size, n = 0, start_size, len(vals)
+    failed_size: Optional[int] = None  # smallest chunk that got a 400/414
+    success_streak = 0
+    # rough fixed part of the request line: path + select + filter names/values
+    base_len = 64 + len(table) + len(quote(cols)) + len(colname) + sum(
+        len(k) + len(str(v)) + 8 for _, k, v in (extra_filters or []))
 
     while i < n:
         chunk = vals[i:i+size]
+        # circuit-breaker on estimated URL length: each value costs its encoded length + quotes/comma
+        est = base_len
+        for j, v in enumerate(chunk):
+            est += len(quote(v)) + 3
+            if est > SUPABASE_URL_MAX and j > 0:
+                chunk = chunk[:j]
+                break
         try:
             q = sb.table(table).select(cols).in_(colname, chunk)
             if extra_filters:
@@ -1473,13 +1690,24 @@ def _safe_in_select(
                     else: pass
             res = q.execute()
             out.extend(getattr(res, "data", None) or [])
-            i += size  # success → advance window
+            i += len(chunk)  # success → advance window
+            success_streak += 1
+            # growing is pointless once the URL cap is what's trimming the chunks
+            if success_streak >= 4 and len(chunk) == size:
+                size = min(size * 2, start_size * 2)
+                if failed_size is not None:  # close in on the failing size instead of retrying it
+                    size = max(1, min(size, (len(chunk) + failed_size) // 2, failed_size - 1))
+                success_streak = 0
         except Exception as e:
+            success_streak = 0
             msg = str(e)
             if "414" in msg or "Request-URI Too Large" in msg or "JSON could not be generated" in msg or "Bad Request" in msg:
-                if size > 10:
-                    size //= 2
-                elif size > 1:
+                sent = len(chunk)
+                if sent > 1:  # a lone value failing says nothing about batch size
+                    failed_size = sent if failed_size is None else min(failed_size, sent)
+                if sent > 10:
+                    size = sent // 2
+                elif sent > 1:
                     size = 1
                 else:
                     # give up on this one item if even size=1 keeps failing
@@ -1487,7 +1715,7 @@ def _safe_in_select(
                     i += 1
             else:
                 print("WARN: IN-select batch failed ->", repr(e))
-                i += size
+                i += len(chunk)
     return out
 
 def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = None):
@@ -1515,26 +1743,38 @@ def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = N
         return " ".join(parts[:2]) if len(parts) >= 2 else s.strip()
 
     with open_text(csv_path) as f:
-        sample = f.read(4096); f.seek(0)
-        dialect = csv.Sniffer().sniff(sample, delimiters=",\t|")
-        reader = csv.DictReader(f, dialect=dialect)
+        # Known flat-file format: fixed delimiter, plain row tuples (no Sniffer, no DictReader)
+        reader = csv.reader(f, delimiter=USDA_DELIM)
+        header = next(reader, None) or []
+        col = {name.strip().lstrip("\ufeff"): i for i, name in enumerate(header)}
 
-        # Resolve header names
-        def get(row, *cands):
+        # Resolve header names once
+        def idx(*cands) -> int:
             for c in cands:
-                if c in row and row[c] is not None:
-                    return row[c]
-            return None
+                if c in col:
+                    return col[c]
+            return -1
+
+        sym_i    = idx("Symbol")
+        synsym_i = idx("Synonym Symbol")
+        sci_i    = idx("Scientific Name with Author", "Scientific Name with Authors", "Scientific Name")
+        common_i = idx("Common Name", "National Common Name")
+        if sym_i < 0 or sci_i < 0:
+            print(f"ERROR: USDA header missing Symbol/Scientific Name columns (delimiter={USDA_DELIM!r}): {header[:8]}")
+            return
+
+        def cell(row: list[str], i: int) -> str:
+            return row[i].strip() if 0 <= i < len(row) else ""
 
         groups = defaultdict(lambda: {"accepted_sci": None, "common": None, "syn_sci": []})
         rows_seen = 0
 
         for row in reader:
             rows_seen += 1
-            sym      = (get(row, "Symbol") or "").strip()
-            synsym   = (get(row, "Synonym Symbol") or "").strip()
-            sci_auth = (get(row, "Scientific Name with Author", "Scientific Name with Authors", "Scientific Name") or "").strip()
-            common   = (get(row, "Common Name", "National Common Name") or "").strip()
+            sym      = cell(row, sym_i)
+            synsym   = cell(row, synsym_i)
+            sci_auth = cell(row, sci_i)
+            common   = cell(row, common_i)
 
             if not sym or not sci_auth:
                 continue
@@ -1579,7 +1819,39 @@ def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = N
                 print("WARN: plants lookup batch failed ->", repr(e))
         return out
 
-    name_to_id.update(_fetch_ids_by_name(list(all_lookup)))
+    def _resolve_names_rpc(names: list[str]) -> Optional[tuple[dict[str, str], dict[str, str]]]:
+        """One RPC per chunk returning both exact plant hits and scientific-synonym hits; None if unavailable."""
+        exact: dict[str, str] = {}
+        via_syn: dict[str, str] = {}
+        names = [n for n in names if n]
+        # max-rows silently truncates the result, and one name can return several rows, so
+        # send at most a page's worth of names and keep paging while a page comes back full
+        page = SUPABASE_MAX_ROWS
+        for i in range(0, len(names), page):
+            offset = 0
+            while True:
+                try:
+                    res = sb.rpc(USDA_RESOLVE_RPC, {
+                        "names": names[i:i+page], "page_size": page, "page_offset": offset,
+                    }).execute()
+                except Exception as e:
+                    print(f"WARN: {USDA_RESOLVE_RPC} RPC failed; using two-step lookup ->", repr(e))
+                    return None
+                rows = res.data or []
+                for r in rows:
+                    (exact if r.get("source") == "exact" else via_syn)[r["name"]] = r["plant_id"]
+                if len(rows) < page:
+                    break
+                offset += page
+        return exact, via_syn
+
+    resolved = _resolve_names_rpc(list(all_lookup)) if USDA_RESOLVE_RPC else None
+    syn_to_id: Dict[str, str] = {}
+    if resolved is not None:
+        name_to_id.update(resolved[0])
+        syn_to_id = resolved[1]
+    else:
+        name_to_id.update(_fetch_ids_by_name(list(all_lookup)))
 
     matched_exact = sum(1 for s in accepted_names if s in name_to_id)
     matched_binom = sum(1 for s in accepted_names if s not in name_to_id and canon_binomial(s) in name_to_id)
@@ -1589,15 +1861,19 @@ def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = N
     unresolved = [n for n in accepted_names if n not in name_to_id and canon_binomial(n) not in name_to_id]
     print(f"USDA: unresolved after exact+binomial = {len(unresolved)}")
     if unresolved:
-        rows = _safe_in_select(
-            sb,
-            table="plant_synonyms",
-            cols="plant_id,name",
-            colname="name",
-            values=unresolved,
-            extra_filters=[("eq","kind","scientific")],
-            start_size=int(os.getenv("SUPABASE_IN_MAX", "80")),
-        )
+        if resolved is not None:
+            # synonym hits already came back with the RPC
+            rows = [{"name": n, "plant_id": syn_to_id[n]} for n in unresolved if n in syn_to_id]
+        else:
+            rows = _safe_in_select(
+                sb,
+                table="plant_synonyms",
+                cols="plant_id,name",
+                colname="name",
+                values=unresolved,
+                extra_filters=[("eq","kind","scientific")],
+                start_size=int(os.getenv("SUPABASE_IN_MAX", "80")),
+            )
         for r in rows:
             name_to_id[r["name"]] = r["plant_id"]
         print(f"USDA: resolved via scientific synonyms = {len(rows)}")
@@ -1605,13 +1881,20 @@ def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = N
     # Build updates + synonym inserts
     set_display = os.getenv("USDA_SET_DISPLAY", "1") == "1"
     updates: list[tuple[str, Dict[str, Any]]] = []
-    to_insert: list[dict] = []
-    seen_common = set()
-    seen_scient = set()
+    # synonym rows as parallel columns (plant_id, name, kind, locale) for the bulk RPC
+    syn_pids: list[str] = []
+    syn_names: list[str] = []
+    syn_kinds: list[str] = []
+    syn_locales: list[Optional[str]] = []
+    # (pid, lower(name)) per kind — kind/locale are implied by which set we're in
+    seen_common: set[tuple[str, str]] = set()
+    seen_scient: set[tuple[str, str]] = set()
 
     # For checking plant_name==plant_scientific_name safely we fetch current values in one more pass
     # Gather plant_ids we intend to update with display
     candidate_for_display = set()
+    # pid -> USDA common, built once here so the display pass below is a dict lookup per id
+    common_by_pid: Dict[str, str] = {}
 
     for sym, g in groups.items():
         acc = g["accepted_sci"]
@@ -1624,24 +1907,27 @@ def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = N
 
         # common synonym
         if g["common"]:
-            key = (pid, g["common"].lower(), "common", "en-US")
+            key = (pid, g["common"].lower())
             if key not in seen_common:
                 seen_common.add(key)
-                to_insert.append({"plant_id": pid, "name": g["common"], "kind": "common", "locale": "en-US"})
+                syn_pids.append(pid); syn_names.append(g["common"])
+                syn_kinds.append("common"); syn_locales.append("en-US")
             if set_display:
                 candidate_for_display.add(pid)
+                common_by_pid[pid] = g["common"]
 
         # scientific synonyms
         for syn_sci in g["syn_sci"]:
             nm = syn_sci.strip()
             if not nm:
                 continue
-            key = (pid, nm.lower(), "scientific", "")
+            key = (pid, nm.lower())
             if key not in seen_scient:
                 seen_scient.add(key)
-                to_insert.append({"plant_id": pid, "name": nm, "kind": "scientific", "locale": None})
+                syn_pids.append(pid); syn_names.append(nm)
+                syn_kinds.append("scientific"); syn_locales.append(None)
 
-    print(f"USDA: prepared common_synonyms={len([x for x in to_insert if x['kind']=='common'])} scientific_synonyms={len([x for x in to_insert if x['kind']=='scientific'])}")
+    print(f"USDA: prepared common_synonyms={len(seen_common)} scientific_synonyms={len(seen_scient)}")
 
     # Only set display where plant_name still equals plant_scientific_name (safe, non-clobber)
     if set_display and candidate_for_display:
@@ -1656,16 +1942,9 @@ def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = N
                 rows = res.data or []
                 wanted = set(r["id"] for r in rows if (r.get("plant_name") or "").strip() == (r.get("plant_scientific_name") or "").strip())
                 # map pid → USDA common we computed above
-                # build a quick index pid -> common
-                common_by_pid = {}
-                for sym, g in groups.items():
-                    acc = g["accepted_sci"]
-                    if not acc or not g["common"]: continue
-                    pid = (name_to_id.get(acc) or name_to_id.get(canon_binomial(acc)))
-                    if pid in wanted:
-                        common_by_pid[pid] = g["common"]
-                updates.extend([(pid, {"plant_name": nm}) for pid, nm in common_by_pid.items()])
-                safe_updates += len(common_by_pid)
+                batch_updates = [(pid, {"plant_name": common_by_pid[pid]}) for pid in wanted if pid in common_by_pid]
+                updates.extend(batch_updates)
+                safe_updates += len(batch_updates)
             except Exception as e:
                 print("WARN: fetch current names failed ->", repr(e))
         print(f"USDA: display_name_safe_updates={safe_updates}")
@@ -1675,13 +1954,17 @@ def enrich_usda_common_names(sb: Client, csv_path: str, limit: Optional[int] = N
         updated = _parallel_update_plants(updates, workers=DB_CONCURRENCY, batch=200)
         print(f"USDA: rows_updated={updated}")
 
-    if to_insert:
-        _parallel_upsert_synonyms(to_insert, batch=WFO_BATCH, workers=DB_CONCURRENCY)
+    if syn_pids:
+        _parallel_upsert_synonym_columns(syn_pids, syn_names, syn_kinds, syn_locales, workers=DB_CONCURRENCY)
 
-def _wikidata_fetch_common_by_gbif_keys(keys: list[int]) -> dict[int, list[str]]:
+def _wikidata_fetch_common_by_gbif_keys(keys: list[int]) -> dict[int, str]:
+    """
+    Return {gbif_key: preferred english common} via P846 -> P1843.
+    The preferred name is picked once per key here, so callers just do a lookup.
+    """
     if not keys: return {}
     ses = _wikidata_session()
-    out: dict[int, list[str]] = defaultdict(list)
+    all_cands: dict[int, list[str]] = defaultdict(list)
 
     for i in range(0, len(keys), WIKIDATA_BATCH):
         batch = keys[i:i+WIKIDATA_BATCH]
@@ -1708,23 +1991,28 @@ def _wikidata_fetch_common_by_gbif_keys(keys: list[int]) -> dict[int, list[str]]
                 common   = b.get("common", {}).get("value")
                 if gbif_str and common:
                     try:
-                        out[int(gbif_str)].append(common)
+                        all_cands[int(gbif_str)].append(common)
                     except ValueError:
                         pass
         except Exception as e:
             print("WARN: WDQS P846 batch failed ->", repr(e))
         time.sleep(0.15)  # be nice
 
+    out: dict[int, str] = {}
+    for k, v in all_cands.items():
+        best = _pick_preferred_en_common_from_wikidata(v)
+        if best:
+            out[k] = best
     return out
 
-def _wikidata_fetch_common_by_scientific(scis: list[str]) -> dict[str, list[str]]:
+def _wikidata_fetch_common_by_scientific(scis: list[str]) -> dict[str, str]:
     """
-    Return {scientific_name_input: [english common names]} via P225 -> P1843.
-    We send VALUES for *exact* strings; call this with both full and canonical names.
+    Return {scientific_name_input: preferred english common} via P225 -> P1843.
+    We send VALUES for *exact* strings; pass the union of full and canonical names.
     """
     if not scis: return {}
     ses = _wikidata_session()
-    out: dict[str, list[str]] = defaultdict(list)
+    all_cands: dict[str, list[str]] = defaultdict(list)
 
     for i in range(0, len(scis), WIKIDATA_BATCH):
         batch = scis[i:i+WIKIDATA_BATCH]
@@ -1754,11 +2042,16 @@ def _wikidata_fetch_common_by_scientific(scis: list[str]) -> dict[str, list[str]
                 sci    = b.get("sci", {}).get("value")
                 common = b.get("common", {}).get("value")
                 if sci and common:
-                    out[sci].append(common)
+                    all_cands[sci].append(common)
         except Exception as e:
             print("WARN: WDQS P225 batch failed ->", repr(e))
         time.sleep(0.15)
 
+    out: dict[str, str] = {}
+    for k, v in all_cands.items():
+        best = _pick_preferred_en_common_from_wikidata(v)
+        if best:
+            out[k] = best
     return out
 
 def enrich_wikidata(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = None):
@@ -1769,7 +2062,6 @@ def enrich_wikidata(sb: Client, batch_size: int = 20000, max_rows: Optional[int]
       Insert as common synonyms; optionally set plant_name when == scientific.
     """
     processed = 0
-    offset = 0
     set_display = WIKIDATA_SET_DISPLAY
 
     # reuse your canon_binomial from USDA section
@@ -1781,21 +2073,7 @@ def enrich_wikidata(sb: Client, batch_size: int = 20000, max_rows: Optional[int]
         parts = s.strip().split()
         return " ".join(parts[:2]) if len(parts) >= 2 else s.strip()
 
-    while True:
-        res = sb.table("plants").select(
-            "id, plant_scientific_name, plant_name, gbif_usage_key"
-        ).range(offset, offset + batch_size - 1).execute()
-        rows = res.data or []
-        if not rows:
-            break
-
-        need = [r for r in rows
-                if r.get("plant_scientific_name") and r.get("plant_name")
-                and r["plant_scientific_name"].strip() == r["plant_name"].strip()]
-
-        if not need:
-            offset += batch_size
-            continue
+    for need in _iter_plants_needing_common("id, plant_scientific_name, plant_name, gbif_usage_key", batch_size):
 
         if max_rows is not None:
             if processed >= max_rows:
@@ -1807,27 +2085,19 @@ def enrich_wikidata(sb: Client, batch_size: int = 20000, max_rows: Optional[int]
         # -------- A) P846 path
         keyed = [r for r in need if r.get("gbif_usage_key") is not None]
         keys  = sorted({int(r["gbif_usage_key"]) for r in keyed if r.get("gbif_usage_key") is not None})
-        wd_by_key: dict[int, list[str]] = _wikidata_fetch_common_by_gbif_keys(keys) if keys else {}
+        wd_by_key: dict[int, str] = _wikidata_fetch_common_by_gbif_keys(keys) if keys else {}
 
         # -------- B) P225 fallback (both full + canonical)
-        wd_by_sci: dict[str, list[str]] = {}
+        wd_by_sci: dict[str, str] = {}
         if WIKIDATA_BY_SCI:
             sci_full  = [r["plant_scientific_name"].strip() for r in need]
-            sci_canon = [canon_binomial(s) for s in sci_full]
-            # Query in two passes to maximize hits
-            m_full  = _wikidata_fetch_common_by_scientific(sci_full)
-            m_canon = _wikidata_fetch_common_by_scientific(sci_canon)
-            wd_by_sci.update(m_full)
-            # merge canon results (don’t overwrite full-name matches)
-            for k, v in m_canon.items():
-                wd_by_sci.setdefault(k, []).extend(v)
+            # One pass over the union; full-vs-canonical preference is applied at lookup time
+            all_scis = sorted({*sci_full, *(canon_binomial(s) for s in sci_full)})
+            wd_by_sci = _wikidata_fetch_common_by_scientific(all_scis)
 
         updates: list[tuple[str, Dict[str, Any]]] = []
         syns: list[dict] = []
-        seen_syn = set()
-
-        def take_best(cands: list[str]) -> Optional[str]:
-            return _pick_preferred_en_common_from_wikidata(cands or [])
+        seen_syn: set[tuple[str, str]] = set()  # (pid, lower(name))
 
         # Build updates
         for r in need:
@@ -1837,16 +2107,16 @@ def enrich_wikidata(sb: Client, batch_size: int = 20000, max_rows: Optional[int]
             best = None
             if r.get("gbif_usage_key") is not None:
                 k = int(r["gbif_usage_key"])
-                best = take_best(wd_by_key.get(k, []))
+                best = wd_by_key.get(k)
             if not best and WIKIDATA_BY_SCI:
                 # prefer full-name match; else canonical
-                best = take_best(wd_by_sci.get(sci, [])) or take_best(wd_by_sci.get(canon_binomial(sci), []))
+                best = wd_by_sci.get(sci) or wd_by_sci.get(canon_binomial(sci))
 
             if not best or best.strip().lower() == sci.lower():
                 continue
 
             # add synonym
-            syn_key = (pid, best.strip().lower(), "common", "en")
+            syn_key = (pid, best.strip().lower())
             if syn_key not in seen_syn:
                 seen_syn.add(syn_key)
                 syns.append({"plant_id": pid, "name": best, "kind": "common", "locale": "en"})
@@ -1865,8 +2135,6 @@ def enrich_wikidata(sb: Client, batch_size: int = 20000, max_rows: Optional[int]
         if syns:
             _parallel_upsert_synonyms(syns, batch=WFO_BATCH, workers=DB_CONCURRENCY)
 
-        offset += batch_size
-
 def enrich_inat(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = None):
     """
     iNaturalist enrichment with synonym fallback:
@@ -1877,19 +2145,24 @@ def enrich_inat(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
     This complements USDA + GBIF + WD and usually adds many thousands.
     """
     processed = 0
-    offset = 0
 
     allowed = set((os.getenv("ALLOWED_PLANT_FIELDS") or
                    "plant_name,family,genus,rank").split(","))
 
     async def _batch_inat(need_rows: list[dict], syn_map: dict[str, list[str]]):
         """
-        For each plant row, try scientific -> then synonyms. Build updates + common synonyms.
+        For each distinct scientific name, try scientific -> then synonyms (union over all
+        plants sharing that name). Fan the result out to every plant row; build updates + common synonyms.
         """
         updates: list[tuple[str, Dict[str, Any]]] = []
         syns: list[dict] = []
         syn_seen = set()  # (pid, lower(name))
 
+        # one external lookup per scientific name, however many plant rows share it
+        by_sci: dict[str, list[dict]] = defaultdict(list)
+        for r in need_rows:
+            by_sci[r.get("plant_scientific_name") or ""].append(r)
+
         sem = asyncio.Semaphore(INAT_MATCH_LIMIT)
 
         async with httpx.AsyncClient(
@@ -1898,10 +2171,7 @@ def enrich_inat(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
             headers={"User-Agent": USER_AGENT},
         ) as client:
 
-            async def resolve_one(r):
-                pid = r["id"]
-                sci = r.get("plant_scientific_name") or ""
-                display_now = r.get("plant_name") or ""
+            async def resolve_one_sci(sci: str, rows: list[dict]):
                 # Try scientific first
                 async with sem:
                     taxon = await _inat_match_name(client, sci)
@@ -1910,9 +2180,10 @@ def enrich_inat(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
                 def same_as_scientific(c: Optional[str]) -> bool:
                     return c and c.strip().lower() == sci.strip().lower()
 
-                # If empty or same as scientific, try synonyms
+                # If empty or same as scientific, try synonyms of every plant in the group
                 if (not common) or same_as_scientific(common):
-                    for nm in syn_map.get(pid, []):
+                    alt_names = dict.fromkeys(nm for r in rows for nm in syn_map.get(r["id"], []))
+                    for nm in alt_names:
                         async with sem:
                             taxon2 = await _inat_match_name(client, nm)
                         common = _inat_pick_en_common(taxon2) if taxon2 else None
@@ -1920,9 +2191,13 @@ def enrich_inat(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
                             break  # good enough
 
                 # If we found a usable English common, stage writes
-                if common and not same_as_scientific(common):
+                if not common or same_as_scientific(common):
+                    return
+                for r in rows:
+                    pid = r["id"]
+                    display_now = r.get("plant_name") or ""
                     # store synonym
-                    key = (pid, common.lower(), "common", "en")
+                    key = (pid, common.lower())
                     if key not in syn_seen:
                         syn_seen.add(key)
                         syns.append({"plant_id": pid, "name": common, "kind": "common", "locale": "en"})
@@ -1933,25 +2208,12 @@ def enrich_inat(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
                         payload = {k: v for k, v in payload.items() if k in allowed}
                         if payload:
                             updates.append((pid, payload))
-                # else nothing to do
 
-            await asyncio.gather(*[resolve_one(r) for r in need_rows])
+            await asyncio.gather(*[resolve_one_sci(sci, rows) for sci, rows in by_sci.items()])
 
         return updates, syns
 
-    while True:
-        res = sb.table("plants").select("id, plant_scientific_name, plant_name").range(offset, offset + batch_size - 1).execute()
-        rows = res.data or []
-        if not rows:
-            break
-
-        need = [r for r in rows
-                if r.get("plant_scientific_name") and r.get("plant_name")
-                and r["plant_scientific_name"].strip() == r["plant_name"].strip()]
-
-        if not need:
-            offset += batch_size
-            continue
+    for need in _iter_plants_needing_common("id, plant_scientific_name, plant_name", batch_size):
 
         if max_rows is not None:
             if processed >= max_rows:
@@ -1978,8 +2240,6 @@ def enrich_inat(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
         if syns:
             _parallel_upsert_synonyms(syns, batch=WFO_BATCH, workers=DB_CONCURRENCY)
 
-        offset += batch_size
-
 def enrich_itis(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = None):
     """
     ITIS enrichment with synonym fallback:
@@ -1988,13 +2248,12 @@ def enrich_itis(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
       - Insert common-name synonyms (locale='en'); set plant_name only when safe.
     """
     processed = 0
-    offset = 0
     allowed = set((os.getenv("ALLOWED_PLANT_FIELDS") or "plant_name").split(","))
 
     async def _batch_itis(need_rows: list[dict], syn_map: dict[str, list[str]]):
         updates: list[tuple[str, Dict[str, Any]]] = []
         syns: list[dict] = []
-        syn_seen = set()
+        syn_seen = set()  # (pid, lower(name))
 
         tsn_cache: dict[str, Optional[str]] = {}     # name -> tsn
         name_common_cache: dict[str, list[str]] = {} # tsn -> commons
@@ -2022,10 +2281,7 @@ def enrich_itis(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
                 name_common_cache[tsn] = arr
                 return arr
 
-            async def resolve_one(r):
-                pid = r["id"]
-                sci = r.get("plant_scientific_name") or ""
-                display_now = r.get("plant_name") or ""
+            async def resolve_one_sci(sci: str, rows: list[dict]):
                 chosen = None
 
                 # accepted name
@@ -2036,9 +2292,10 @@ def enrich_itis(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
                 if commons:
                     chosen = sorted(commons, key=lambda s: (len(s.split()), len(s)))[0]
 
-                # fallback via scientific synonyms
+                # fallback via scientific synonyms of every plant sharing this name
                 if not chosen or chosen.strip().lower() == sci.strip().lower():
-                    for nm in syn_map.get(pid, []):
+                    alt_names = dict.fromkeys(nm for r in rows for nm in syn_map.get(r["id"], []))
+                    for nm in alt_names:
                         tsn2 = await tsn_for(nm)
                         commons2 = await commons_for_tsn(tsn2) if tsn2 else []
                         if commons2:
@@ -2047,8 +2304,12 @@ def enrich_itis(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
                                 chosen = c2
                                 break
 
-                if chosen and chosen.strip().lower() != sci.strip().lower():
-                    key = (pid, chosen.lower(), "common", "en")
+                if not chosen or chosen.strip().lower() == sci.strip().lower():
+                    return
+                for r in rows:
+                    pid = r["id"]
+                    display_now = r.get("plant_name") or ""
+                    key = (pid, chosen.lower())
                     if key not in syn_seen:
                         syn_seen.add(key)
                         syns.append({"plant_id": pid, "name": chosen, "kind": "common", "locale": "en"})
@@ -2058,20 +2319,14 @@ def enrich_itis(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
                         if payload:
                             updates.append((pid, payload))
 
-            await asyncio.gather(*[resolve_one(r) for r in need_rows])
+            # one ITIS lookup per scientific name, however many plant rows share it
+            by_sci: dict[str, list[dict]] = defaultdict(list)
+            for r in need_rows:
+                by_sci[r.get("plant_scientific_name") or ""].append(r)
+            await asyncio.gather(*[resolve_one_sci(sci, rows) for sci, rows in by_sci.items()])
         return updates, syns
 
-    while True:
-        res = sb.table("plants").select("id, plant_scientific_name, plant_name").range(offset, offset + batch_size - 1).execute()
-        rows = res.data or []
-        if not rows: break
-
-        need = [r for r in rows
-                if r.get("plant_scientific_name") and r.get("plant_name")
-                and r["plant_scientific_name"].strip() == r["plant_name"].strip()]
-        if not need:
-            offset += batch_size
-            continue
+    for need in _iter_plants_needing_common("id, plant_scientific_name, plant_name", batch_size):
 
         if max_rows is not None:
             if processed >= max_rows: return
@@ -2092,8 +2347,6 @@ def enrich_itis(sb: Client, batch_size: int = 20000, max_rows: Optional[int] = N
         if syns:
             _parallel_upsert_synonyms(syns, batch=WFO_BATCH, workers=DB_CONCURRENCY)
 
-        offset += batch_size
-
 
 # ---------- CLI ----------
 def main():
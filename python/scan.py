@@ -19,139 +19,737 @@ Optional flags:
   --sci-pattern REGEX       Override scientific-name regex (default targets Saintpaulia and Streptocarpus ionanth-)
   --vern-pattern REGEX      Override vernacular-name regex (default '(?i)african\\s+violet')
   --lang en,eng             CSV list of 2/3-letter language filters for vernaculars (default 'en,eng')
+  --workers N               Processes for the scans (default: CPU count; 1 = single process)
+
+Optional:
+  pip install hyperscan     # whole-file prefilter scans run on Hyperscan instead of `re`
 """
 
 import argparse
+import contextlib
+import mmap
+import multiprocessing
 import os
 import re
-from typing import Dict, Iterable, List, Optional, Tuple
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import hyperscan  # optional: SIMD DFA for the whole-file prefilter scan
+except ImportError:
+    hyperscan = None
+
+# Files smaller than this are scanned in one piece; process start-up would cost more than it saves
+PARALLEL_MIN_BYTES = 64 << 20
 
 # ---------------- Stream helpers ----------------
 
-def iter_tsv_select(path: str, wanted: List[str]) -> Iterable[dict]:
+Wanted = Dict[str, Tuple[str, ...]]  # output key -> header aliases, in priority order
+
+def _tsv_selector(cols: List[str], wanted: Wanted, raw: bool = False):
+    """
+    Build a function mapping one raw TSV line (bytes) to {key: cell} for each key in
+    `wanted` whose aliases match a column in `cols` (case-insensitive, resolved once here).
+    When several aliases are present the first non-empty cell wins. Keys with no matching
+    column are omitted. Only selected cells are decoded, and with raw=True none are.
+
+    The same dict is cleared and refilled on every call: read what you need from it (or
+    copy it) before selecting the next line, never keep a reference to it.
+    """
+    low_to_idx = {c.lower(): i for i, c in enumerate(cols)}
+
+    single: List[Tuple[str, int]] = []
+    multi: List[Tuple[str, List[int]]] = []
+    for key, aliases in wanted.items():
+        idxs: List[int] = []
+        for a in aliases:
+            i = low_to_idx.get(a.lower())
+            if i is not None and i not in idxs:
+                idxs.append(i)
+        if len(idxs) == 1:
+            single.append((key, idxs[0]))
+        elif idxs:
+            multi.append((key, idxs))
+
+    out: dict = {}
+
+    def select(line: bytes) -> dict:
+        cells = line.rstrip(b"\r").split(b"\t")
+        n = len(cells)
+        out.clear()
+        for k, i in single:
+            if i < n:
+                out[k] = cells[i] if raw else cells[i].decode("utf-8", "replace")
+        for k, idxs in multi:
+            present = [cells[i] for i in idxs if i < n]
+            if present:
+                v = next((c for c in present if c), present[0])
+                out[k] = v if raw else v.decode("utf-8", "replace")
+        return out
+
+    return select
+
+def iter_tsv_select(path: str, wanted: Wanted, chunk_size: int = 1 << 22, raw: bool = False) -> Iterable[dict]:
     """
     Streaming TSV reader for GBIF DwC-A files (unquoted, tab-separated).
-    Yields dicts containing only the requested columns (case-insensitive match).
-    Missing columns are omitted.
+    Yields dicts keyed by the `wanted` keys (see _tsv_selector); missing columns are omitted.
+    The yielded dict is reused for the next row, so copy out anything you keep.
+
+    Reads raw bytes in ~4 MiB chunks and splits lines/cells with bytes.split, so only
+    the requested cells are ever decoded (GBIF rows carry 20+ columns we ignore).
+    raw=True yields the cells as undecoded bytes.
     """
-    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+    with open(path, "rb", buffering=1 << 20) as f:
         header = f.readline()
         if not header:
             return
-        cols = header.rstrip("\r\n").split("\t")
-        low_to_idx = {c.lower(): i for i, c in enumerate(cols)}
-
-        # map each wanted name to its column index, if present
-        indices: Dict[str, int] = {}
-        for w in wanted:
-            i = low_to_idx.get(w.lower())
-            if i is not None:
-                indices[w] = i
-
-        for line in f:
-            cells = line.rstrip("\r\n").split("\t")
-            out = {}
-            for w, i in indices.items():
-                if i < len(cells):
-                    out[w] = cells[i]
-            yield out
-
-def first_nonempty(row: dict, *keys: str) -> Optional[str]:
-    for k in keys:
-        v = row.get(k)
-        if v is not None and v != "":
-            return v
-    # case-insensitive fallbacks
-    low = {kk.lower(): kk for kk in row.keys()}
+        select = _tsv_selector(header.decode("utf-8", "replace").rstrip("\r\n").split("\t"), wanted, raw)
+
+        residual = b""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines = (residual + chunk).split(b"\n") if residual else chunk.split(b"\n")
+            residual = lines.pop()  # partial last line (or b"" if chunk ended on \n)
+            for line in lines:
+                yield select(line)
+        if residual:
+            yield select(residual)
+
+def _split_top(pat: str, sep: str = "|") -> List[str]:
+    """Split a regex source on `sep` at group depth 0 (outside escapes and [...] classes)."""
+    parts: List[str] = []
+    depth, in_class, i, last = 0, False, 0, 0
+    while i < len(pat):
+        c = pat[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+            if pat[i + 1:i + 2] == "^":
+                i += 1
+            if pat[i + 1:i + 2] == "]":
+                i += 1
+        elif c == sep and depth == 0:
+            parts.append(pat[last:i])
+            last = i + 1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        i += 1
+    parts.append(pat[last:])
+    return parts
+
+def literal_prefixes(rx: re.Pattern) -> Optional[Tuple[str, ...]]:
+    """
+    Literal text every match of an anchored `rx` must start with, one entry per top-level
+    alternative, e.g. (?i)^(saintpaulia(\b|$)|streptocarpus\s+ionanth) -> ("saintpaulia",
+    "streptocarpus"). Lowercased for case-insensitive patterns. None unless every
+    alternative is ^-anchored and starts with at least one literal character.
+    """
+    pat = rx.pattern
+    if not isinstance(pat, str) or not pat.isascii() or rx.flags & re.VERBOSE:
+        return None
+    flags = re.match(r"\(\?[aiLmsu]+\)", pat)
+    body = pat[flags.end():] if flags else pat
+
+    prefixes: List[str] = []
+    for alt in _split_top(body):
+        if alt.startswith("^"):
+            alt = alt[1:]
+        elif alt.startswith("\\A"):
+            alt = alt[2:]
+        else:
+            return None
+        inner = [alt]
+        if alt.startswith("("):
+            head = _split_top(alt[1:], ")")  # [group body, text after it, ...]
+            if len(head) < 2 or head[0].startswith("?") and not head[0].startswith("?:"):
+                return None
+            if head[1][:1] in ("?", "*", "{"):  # optional group: no required prefix
+                return None
+            inner = _split_top(head[0][2:] if head[0].startswith("?:") else head[0])
+        for a in inner:
+            n = 0
+            while n < len(a) and (a[n].isalnum() or a[n] in " _-"):
+                n += 1
+            if n < len(a) and a[n] in "?*{":
+                n -= 1  # last literal is optional
+            if n <= 0:
+                return None
+            prefixes.append(a[:n].lower() if rx.flags & re.IGNORECASE else a[:n])
+    return tuple(prefixes)
+
+def _alt_literals(alt: str) -> Optional[List[str]]:
+    """
+    Literal text every match of one alternative must contain: its longest unconditional run
+    outside groups and classes or, for an alternative that is just one group (give or take
+    anchors and \\b), one such run per alternative inside it. None if there isn't one.
+    """
+    runs: List[str] = []
+    run: List[str] = []
+
+    def flush(optional_last: bool = False) -> None:
+        lit = "".join(run[:-1] if optional_last else run)
+        if lit:
+            runs.append(lit)
+        run.clear()
+
+    depth, in_class, i = 0, False, 0
+    while i < len(alt):
+        c = alt[i]
+        if c == "\\":
+            flush()
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            flush()
+            in_class = True
+            if alt[i + 1:i + 2] == "^":
+                i += 1
+            if alt[i + 1:i + 2] == "]":
+                i += 1
+        elif c == "(":
+            flush()
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif depth == 0 and c == "{":
+            flush(optional_last=True)
+            close = alt.find("}", i)
+            i = close if close > 0 else i
+        elif depth == 0 and c in "?*":
+            flush(optional_last=True)
+        elif depth == 0 and (c.isalnum() or c in " _-"):
+            run.append(c)
+        elif depth == 0:
+            flush()
+        i += 1
+    flush()
+    if runs:
+        return [max(runs, key=len)]
+
+    group = re.fullmatch(r"(?:\^|\\A|\\b)*\((\?:)?(.*)\)(?:\$|\\Z|\\b)*", alt)
+    if group is None or group.group(2).startswith("?") or len(_split_top(group.group(2), ")")) != 1:
+        return None
+    out: List[str] = []
+    for inner in _split_top(group.group(2)):
+        lits = _alt_literals(inner)
+        if lits is None:
+            return None
+        out.extend(lits)
+    return out
+
+def required_literals(rx: re.Pattern) -> Optional[Tuple[str, ...]]:
+    """
+    Literal substrings, one per alternative, such that every match of `rx` contains one of
+    them, e.g. (?i)\\bafrican\\s+violet -> ("african",). Lowercased for case-insensitive
+    patterns. None for non-ASCII/verbose patterns or when some alternative has no literal.
+    """
+    pat = rx.pattern
+    if not isinstance(pat, str) or not pat.isascii() or rx.flags & re.VERBOSE:
+        return None
+    flags = re.match(r"\(\?[aiLmsu]+\)", pat)
+    lits = _alt_literals(f"({pat[flags.end():] if flags else pat})")
+    if lits is None:
+        return None
+    return tuple(dict.fromkeys(l.lower() if rx.flags & re.IGNORECASE else l for l in lits))
+
+# Non-ASCII characters that re.IGNORECASE folds onto an ASCII letter (İ ı, K, ſ), as UTF-8
+_FOLD_EXTRA = {"i": (b"\xc4\xb0", b"\xc4\xb1"), "k": (b"\xe2\x84\xaa",), "s": (b"\xc5\xbf",)}
+# Whitespace str.strip() removes around a cell: bytes \s plus \x1c-\x1f and any non-ASCII
+# byte (a superset of the multi-byte Unicode spaces)
+_STRIP_WS = r"[\s\x1c-\x1f\x80-\xff]*"
+
+def fold_extras(rx: re.Pattern) -> Tuple[bytes, ...]:
+    """
+    UTF-8 of the _FOLD_EXTRA characters a caseless `rx` could match in place of one of its
+    letters; empty for case-sensitive patterns. line_prefilter can't see these, so scans
+    must also treat any line containing one as a hit.
+    """
+    if not rx.flags & re.IGNORECASE or not isinstance(rx.pattern, str):
+        return ()
+    low = rx.pattern.lower()
+    return tuple(x for c, xs in _FOLD_EXTRA.items() if c in low for x in xs)
+
+def line_prefilter(rx: re.Pattern, anchors: bool = True) -> Optional[re.Pattern]:
+    """
+    A bytes regex that can run over a whole file and hits at least every line where some
+    cell matches `rx` (false positives are fine — callers re-check the real cell).
+
+    Patterns with literal_prefixes or required_literals reduce to a plain alternation of
+    those literals, which the engine scans several times faster than anything else. Others
+    are translated (_translate_prefilter). None when neither works; callers then scan
+    every row. Under IGNORECASE this misses lines where İ, ı, K or ſ stands in for i/k/s;
+    callers add fold_extras(rx) for those.
+    """
+    lits = literal_prefixes(rx) or required_literals(rx)
+    if lits is not None:
+        return re.compile(b"|".join(re.escape(p.encode("ascii")) for p in lits),
+                          rx.flags & re.IGNORECASE)
+    return _translate_prefilter(rx, anchors)
+
+def _translate_prefilter(rx: re.Pattern, anchors: bool) -> Optional[re.Pattern]:
+    """
+    `rx` rewritten as a bytes regex over whole lines. Cell anchors become tab/newline
+    lookarounds:
+      ^, \\A  ->  (?:(?<=[\\t\\n])|\\A)<ws>*        $, \\Z  ->  <ws>*(?=[\\t\\r\\n]|\\Z)
+    where <ws> is anything str.strip() could have removed. With anchors=False they're
+    dropped instead (a looser filter, for engines without lookaround support).
+
+    None when the bytes form wouldn't be a superset on UTF-8 text: non-ASCII patterns,
+    \\s \\w \\d \\b (and their negations), ".", negated classes, and classes holding letters
+    under IGNORECASE all match non-ASCII characters differently in bytes mode. Also None
+    for anything that fails to compile.
+    """
+    caseless = bool(rx.flags & re.IGNORECASE)
+    pat = rx.pattern
+    if not isinstance(pat, str) or not pat.isascii():
+        return None
+    start_anchor = r"(?:(?<=[\t\n])|\A)" + _STRIP_WS if anchors else ""
+    end_anchor = _STRIP_WS + r"(?=[\t\r\n]|\Z)" if anchors else ""
+    out: List[str] = []
+    i, n, in_class = 0, len(pat), False
+    while i < n:
+        c = pat[i]
+        if c == "\\":
+            esc = pat[i:i + 2]
+            if esc[1:] in ("s", "S", "w", "W", "d", "D", "b", "B"):
+                return None
+            if not in_class and esc == r"\A":
+                out.append(start_anchor)
+            elif not in_class and esc == r"\Z":
+                out.append(end_anchor)
+            elif not in_class and esc[1:].isalpha() and esc[1:] not in "afnrtvx":
+                return None  # other letter escapes (\N{...}, \u...) aren't needed in bytes
+            else:
+                out.append(esc)
+            i += 2
+            continue
+        if in_class:
+            if c == "]":
+                in_class = False
+            elif caseless and c.isalpha():
+                return None
+            out.append(c)
+        elif c == "[":
+            if pat[i + 1:i + 2] == "^":
+                return None
+            in_class = True
+            out.append(c)
+            if pat[i + 1:i + 2] == "]":
+                out.append("]"); i += 1
+        elif c == ".":
+            return None
+        elif c == "^":
+            out.append(start_anchor)
+        elif c == "$":
+            out.append(end_anchor)
+        else:
+            out.append(c)
+        i += 1
+    try:
+        return re.compile("".join(out).encode("ascii"), rx.flags & ~(re.UNICODE | re.MULTILINE))
+    except re.error:
+        return None
+
+def _hyperscan_db(rx: re.Pattern):
+    """Hyperscan database for the anchor-free line_prefilter of `rx`, or None if Hyperscan
+    isn't installed or can't compile it (callers then scan with `re`)."""
+    if hyperscan is None or rx.flags & re.VERBOSE:
+        return None
+    loose = line_prefilter(rx, anchors=False)
+    if loose is None:
+        return None
+    flags = 0
+    if rx.flags & re.IGNORECASE:
+        flags |= hyperscan.HS_FLAG_CASELESS
+    if rx.flags & re.DOTALL:
+        flags |= hyperscan.HS_FLAG_DOTALL
+    try:
+        db = hyperscan.Database()
+        db.compile(expressions=[loose.pattern], ids=[0], elements=1, flags=[flags])
+    except Exception:
+        return None
+    return db
+
+def _hyperscan_line_spans(db, mm: mmap.mmap, pos: int, stop: int) -> Iterable[Tuple[int, int]]:
+    """(start, end) of each line beginning in [pos, stop) that contains a Hyperscan match."""
+    size = len(mm)
+    scan_end = mm.find(b"\n", stop - 1) if stop < size else size  # finish the last line
+    if scan_end < 0:
+        scan_end = size
+    ends: List[int] = []
+    with memoryview(mm) as mv, mv[pos:scan_end] as buf:
+        db.scan(buf, match_event_handler=lambda _id, _from, to, _flags, _ctx: ends.append(to))
+    line_end = -1
+    for to in ends:
+        hit = pos + max(to - 1, 0)  # last byte of the match
+        if hit <= line_end:
+            continue
+        line_start = mm.rfind(b"\n", 0, hit) + 1
+        if line_start >= stop:
+            break
+        line_end = mm.find(b"\n", hit)
+        if line_end < 0:
+            line_end = size
+        yield line_start, line_end
+
+def _re_line_spans(pre: re.Pattern, mm: mmap.mmap, pos: int, stop: int) -> Iterable[Tuple[int, int]]:
+    """(start, end) of each line beginning in [pos, stop) that `pre` hits."""
+    size = len(mm)
+    while pos < stop:
+        m = pre.search(mm, pos)
+        if not m:
+            break
+        line_start = mm.rfind(b"\n", 0, m.start()) + 1
+        if line_start >= stop:
+            break
+        line_end = mm.find(b"\n", m.start())
+        if line_end < 0:
+            line_end = size
+        yield line_start, line_end
+        pos = line_end + 1  # resume on the next line so each line is yielded at most once
+
+def iter_tsv_matching(
+    path: str,
+    wanted: Wanted,
+    rx: re.Pattern,
+    start: int = 0,
+    end: Optional[int] = None,
+    raw: bool = False,
+) -> Iterable[dict]:
+    """
+    Like iter_tsv_select, but only yields rows whose raw line hits line_prefilter(rx).
+    The file is memory-mapped and searched by the regex engine directly, so the vast
+    majority of non-matching rows are never split or decoded in Python. With Hyperscan
+    installed, that whole-file search runs on its DFA instead of `re`.
+
+    start/end restrict the scan to lines *beginning* in [start, end) bytes, so a file can be
+    sharded across processes on arbitrary offsets without splitting or repeating a line.
+    Falls back to iter_tsv_select (every row) if the pattern can't be prefiltered; that
+    path can't be sharded, so it only runs for the shard that starts at 0.
+    raw=True yields the cells as undecoded bytes.
+    """
+    pre = line_prefilter(rx)
+    if pre is None or os.path.getsize(path) == 0:
+        if start == 0:
+            yield from iter_tsv_select(path, wanted, raw=raw)
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        header_end = mm.find(b"\n")
+        if header_end < 0:
+            return
+        select = _tsv_selector(mm[:header_end].decode("utf-8", "replace").rstrip("\r").split("\t"), wanted, raw)
+        size = len(mm)
+        stop = size if end is None else min(end, size)
+        pos = header_end + 1
+        if start > pos:
+            # first line that begins at/after `start`
+            pos = start if mm[start - 1:start] == b"\n" else mm.find(b"\n", start) + 1
+            if pos == 0:
+                return
+        if pos >= stop:
+            return
+        # rare folded letters (İ, K, ſ ...) get added only if this range contains any, so the
+        # usual prefilter keeps its fast literal search
+        scan_end = mm.find(b"\n", stop - 1) if stop < size else size
+        extras = [x for x in fold_extras(rx) if mm.find(x, pos, scan_end if scan_end >= 0 else size) >= 0]
+        db = None
+        if extras:
+            pre = re.compile(b"|".join([pre.pattern] + [re.escape(x) for x in extras]), pre.flags)
+        else:
+            db = _hyperscan_db(rx)
+        spans = _hyperscan_line_spans(db, mm, pos, stop) if db is not None else _re_line_spans(pre, mm, pos, stop)
+        for line_start, line_end in spans:
+            yield select(mm[line_start:line_end])
+
+def _digit_trie(keys: Iterable[str]) -> str:
+    """Regex source matching exactly the given digit strings, factored as a trie so the
+    engine does at most one branch per digit instead of trying every alternative."""
+    trie: dict = {}
     for k in keys:
-        kk = low.get(k.lower())
-        if kk is not None:
-            v = row.get(kk)
-            if v is not None and v != "":
-                return v
-    return None
+        node = trie
+        for ch in k:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        alts = [ch + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return emit(trie)
+
+def iter_tsv_with_ids(path: str, wanted: Wanted, key: str, ids: Set[int]) -> Iterable[dict]:
+    """
+    Yield rows (as iter_tsv_select) whose integer `key` column is in `ids`. When `key`
+    resolves to one column, a bytes regex built from `ids` finds those lines over an mmap,
+    so the per-row loop runs inside the regex engine and only hits reach Python; callers
+    still re-check the parsed key. Otherwise every row is read and filtered.
+    """
+    with open(path, "rb") as f:
+        cols = f.readline().decode("utf-8", "replace").rstrip("\r\n").split("\t")
+    low_to_idx = {c.lower(): i for i, c in enumerate(cols)}
+    key_cols = {low_to_idx[a.lower()] for a in wanted[key] if a.lower() in low_to_idx}
+    if not ids:
+        return
+    if len(key_cols) != 1 or os.path.getsize(path) == 0:
+        for row in iter_tsv_select(path, wanted):
+            yield row
+        return
+
+    (k,) = key_cols
+    rx = re.compile(
+        (r"^(?:[^\t\n]*\t){%d}[ \f\v]*\+?0*(?:%s)[ \f\v]*(?=[\t\r\n]|\Z)"
+         % (k, _digit_trie(str(i) for i in ids if i >= 0))).encode("ascii"),
+        re.MULTILINE,
+    )
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        select = _tsv_selector(cols, wanted)
+        size = len(mm)
+        pos = mm.find(b"\n") + 1
+        if pos == 0:
+            return
+        for m in rx.finditer(mm, pos):
+            line_end = mm.find(b"\n", m.end())
+            yield select(mm[m.start():line_end if line_end >= 0 else size])
+
+def bytes_regex(rx: re.Pattern) -> Optional[re.Pattern]:
+    """
+    Bytes-mode twin of `rx` for matching raw cells, or None for non-ASCII patterns.
+    Only equivalent on ASCII subjects, so callers fall back to `rx` for anything else.
+    """
+    pat = rx.pattern
+    if not isinstance(pat, str) or not pat.isascii():
+        return None
+    try:
+        return re.compile(pat.encode("ascii"), rx.flags & ~re.UNICODE)
+    except re.error:
+        return None
+
+def byte_shards(path: str, rx: re.Pattern, workers: int) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split `path` into `workers` byte ranges for iter_tsv_matching. Returns a single
+    whole-file range when sharding wouldn't pay off or isn't possible.
+    """
+    size = os.path.getsize(path)
+    if workers <= 1 or size < PARALLEL_MIN_BYTES or line_prefilter(rx) is None:
+        return [(0, None)]
+    return [(i * size // workers, (i + 1) * size // workers) for i in range(workers)]
 
 # ---------------- Core search ----------------
 
+USAGE_ALIASES = ("usageKey", "usageID", "taxonID", "taxonId")
+
+TAXON_WANTED: Wanted = {
+    "usageKey": USAGE_ALIASES,
+    "kingdom": ("kingdom",),
+    "rank": ("taxonRank", "rank"),
+    "canonicalName": ("canonicalName",),
+    "scientificName": ("scientificName",),
+    "acceptedNameUsageID": ("acceptedNameUsageID", "acceptedNameUsageId", "acceptedUsageID"),
+}
+
+VERN_WANTED: Wanted = {
+    "usageKey": USAGE_ALIASES,
+    "vernacularName": ("vernacularName",),
+    "language": ("language", "languageCode"),
+}
+
+# Row gates, run on the raw cells so rejected rows are never decoded
+KINGDOM_PLANTAE = re.compile(rb"\s*plantae\s*", re.IGNORECASE)
+RANK_SPECIES = re.compile(rb"\s*species\s*", re.IGNORECASE)
+
+class TaxonTable:
+    """
+    Taxon rows stored column-wise (parallel arrays indexed by row position) with a single
+    usageKey -> position map, instead of a dict per row. Adding an id that's already
+    present overwrites it in place (later rows win, as with a plain dict).
+    accepted holds the accepted usage ID, or -1 when there is none.
+    """
+    __slots__ = ("ids", "kingdoms", "ranks", "canonicals", "scinames", "accepted", "pos_by_id")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.kingdoms: List[str] = []
+        self.ranks: List[str] = []
+        self.canonicals: List[str] = []
+        self.scinames: List[str] = []
+        self.accepted = array("q")
+        self.pos_by_id: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, usage: int) -> bool:
+        return usage in self.pos_by_id
+
+    def pos(self, usage: int) -> Optional[int]:
+        return self.pos_by_id.get(usage)
+
+    def accepted_id(self, p: int) -> Optional[int]:
+        acc = self.accepted[p]
+        return acc if acc >= 0 else None
+
+    def _put(self, usage: int, kingdom: str, rank: str, canonical: str, sci: str, acc: int) -> None:
+        p = self.pos_by_id.get(usage)
+        if p is None:
+            self.pos_by_id[usage] = len(self.ids)
+            self.ids.append(usage)
+            self.kingdoms.append(kingdom)
+            self.ranks.append(rank)
+            self.canonicals.append(canonical)
+            self.scinames.append(sci)
+            self.accepted.append(acc)
+        else:
+            self.kingdoms[p] = kingdom
+            self.ranks[p] = rank
+            self.canonicals[p] = canonical
+            self.scinames[p] = sci
+            self.accepted[p] = acc
+
+    def add(self, usage: int, row: dict) -> None:
+        """Add one decoded TAXON_WANTED row."""
+        acc = row.get("acceptedNameUsageID", "")
+        self._put(
+            usage,
+            row.get("kingdom", "").strip().lower(),
+            row.get("rank", "").strip(),
+            row.get("canonicalName", "").strip(),
+            row.get("scientificName", "").strip(),
+            int(acc) if acc.isascii() and acc.isdigit() else -1,
+        )
+
+    def update(self, other: "TaxonTable") -> None:
+        for p, usage in enumerate(other.ids):
+            self._put(usage, other.kingdoms[p], other.ranks[p], other.canonicals[p],
+                      other.scinames[p], other.accepted[p])
+
 def scan_taxon(
     taxon_path: str,
     sci_regex: re.Pattern,
-) -> Tuple[Dict[int, dict], Dict[int, dict]]:
-    """
-    Scan Taxon.tsv and return:
-      matches_by_id: {usageKey -> row_info} for rows that match the scientific-name pattern
-                     AND are Plantae species.
-      index_by_id:   {usageKey -> row_info} lightweight index for lookups (for accepted names, etc.)
-
-    row_info keys: usageKey, canonicalName, scientificName, rank, kingdom,
-                   acceptedNameUsageID (if present)
-    """
-    wanted = [
-        "kingdom",
-        "taxonRank", "rank",
-        "canonicalName", "scientificName",
-        "taxonID", "taxonId", "usageID", "usageKey",
-        "acceptedNameUsageID", "acceptedNameUsageId", "acceptedUsageID",
-    ]
-    matches_by_id: Dict[int, dict] = {}
-    index_by_id: Dict[int, dict] = {}
-
-    for row in iter_tsv_select(taxon_path, wanted):
-        kingdom = (first_nonempty(row, "kingdom") or "").strip().lower()
-        # keep a lightweight index for potential accepted-name lookups (even if not Plantae/species)
-        usage_s = first_nonempty(row, "usageKey", "usageID", "taxonID", "taxonId")
-        if not usage_s:
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Tuple[TaxonTable, Set[int]]:
+    """
+    Scan Taxon.tsv (or the byte range [start, end) of it) and return:
+      matches:              TaxonTable of rows that match the scientific-name pattern
+                            AND are Plantae species.
+      needed_accepted_ids:  accepted-usage IDs referenced by those matches (resolve them with
+                            build_index_subset instead of indexing every taxon up front).
+    """
+    matches = TaxonTable()
+    needed_accepted_ids: Set[int] = set()
+    sci_bytes = bytes_regex(sci_regex)
+    # cheap startswith gate ahead of the regex for anchored, literal-led patterns
+    prefixes = literal_prefixes(sci_regex)
+    sci_heads = tuple(p.encode("ascii") for p in prefixes) if prefixes else None
+    head_len = max(map(len, sci_heads)) if sci_heads else 0
+    caseless = bool(sci_regex.flags & re.IGNORECASE)
+
+    # only lines the regex hits anywhere are split, then checked cell-wise on raw bytes
+    for row in iter_tsv_matching(taxon_path, TAXON_WANTED, sci_regex, start, end, raw=True):
+        usage_b = row.get("usageKey")
+        if not usage_b:
             continue
         try:
-            usage = int(usage_s)
+            usage = int(usage_b)
         except ValueError:
             continue
 
-        # Store minimal index
-        index_by_id[usage] = {
-            "usageKey": usage,
-            "kingdom": kingdom,
-            "rank": (first_nonempty(row, "taxonRank", "rank") or "").strip(),
-            "canonicalName": (first_nonempty(row, "canonicalName") or "").strip(),
-            "scientificName": (first_nonempty(row, "scientificName") or "").strip(),
-            "acceptedNameUsageID": first_nonempty(row, "acceptedNameUsageID", "acceptedNameUsageId", "acceptedUsageID"),
-        }
-
         # Strict: Plantae + species
-        if kingdom != "plantae":
+        if not KINGDOM_PLANTAE.fullmatch(row.get("kingdom") or b""):
             continue
-        rank = (first_nonempty(row, "taxonRank", "rank") or "").strip().lower()
-        if rank != "species":
+        if not RANK_SPECIES.fullmatch(row.get("rank") or b""):
             continue
 
-        sci = (first_nonempty(row, "canonicalName", "scientificName") or "").strip()
-        if not sci:
+        sci_b = row.get("canonicalName") or row.get("scientificName")
+        if not sci_b:
             continue
+        if sci_bytes is not None and sci_b.isascii():
+            sci_b = sci_b.strip()
+            if sci_heads is not None:
+                head = sci_b[:head_len]
+                if not (head.lower() if caseless else head).startswith(sci_heads):
+                    continue
+            if not sci_b or not sci_bytes.search(sci_b):
+                continue
+        else:
+            sci = sci_b.decode("utf-8", "replace").strip()
+            if not sci or not sci_regex.search(sci):
+                continue
+
+        matches.add(usage, {k: v.decode("utf-8", "replace") for k, v in row.items()})
+        acc = matches.accepted_id(matches.pos(usage))
+        if acc is not None:
+            needed_accepted_ids.add(acc)
 
-        if sci_regex.search(sci):
-            matches_by_id[usage] = index_by_id[usage]
+    return matches, needed_accepted_ids
 
-    return matches_by_id, index_by_id
+
+def build_index_subset(taxon_path: str, needed: Set[int], seed: Optional[TaxonTable] = None) -> TaxonTable:
+    """
+    Stream Taxon.tsv and return a TaxonTable of just the usage IDs in `needed`,
+    plus the accepted usages those rows point at (a second, equally selective pass only
+    runs if some of those weren't captured the first time). Keeps resident rows
+    proportional to the hits, not to the whole backbone.
+
+    Rows already in `seed` (e.g. scan_taxon's matches) are reused, not read again.
+    """
+    def collect(ids: Set[int]) -> TaxonTable:
+        out = TaxonTable()
+        for row in iter_tsv_with_ids(taxon_path, TAXON_WANTED, "usageKey", ids):
+            usage_s = row.get("usageKey")
+            if not usage_s:
+                continue
+            try:
+                usage = int(usage_s)
+            except ValueError:
+                continue
+            if usage in ids:
+                out.add(usage, row)
+        return out
+
+    index = TaxonTable()
+    if seed is not None:
+        index.update(seed)
+    index.update(collect({u for u in needed if u not in index}))
+    missing = {a for a in (index.accepted_id(p) for p in range(len(index)))
+               if a is not None and a not in index and a not in needed}
+    if missing:
+        index.update(collect(missing))
+    return index
 
 
 def scan_vernacular(
     vern_path: str,
     vern_regex: re.Pattern,
     lang_allow: Optional[set] = None,
+    start: int = 0,
+    end: Optional[int] = None,
 ) -> Dict[int, List[str]]:
     """
-    Scan VernacularName.tsv and return vern_by_id: {usageKey -> [vernacularName,...]}
-    filtered by optional language set and regex on vernacularName.
+    Scan VernacularName.tsv (or the byte range [start, end) of it) and return
+    vern_by_id: {usageKey -> [vernacularName,...]} filtered by optional language set
+    and regex on vernacularName.
     """
-    wanted = [
-        "taxonID", "taxonId", "usageID", "usageKey",
-        "vernacularName", "vernacularname",
-        "language", "languageCode",
-    ]
     vern_by_id: Dict[int, List[str]] = {}
 
-    for row in iter_tsv_select(vern_path, wanted):
-        usage_s = first_nonempty(row, "usageKey", "usageID", "taxonID", "taxonId")
+    for row in iter_tsv_matching(vern_path, VERN_WANTED, vern_regex, start, end):
+        usage_s = row.get("usageKey")
         if not usage_s:
             continue
         try:
@@ -159,12 +757,12 @@ def scan_vernacular(
         except ValueError:
             continue
 
-        name = (first_nonempty(row, "vernacularName", "vernacularname") or "").strip()
+        name = row.get("vernacularName", "").strip()
         if not name:
             continue
 
         if lang_allow is not None:
-            lang = (first_nonempty(row, "language", "languageCode") or "").strip().lower()
+            lang = row.get("language", "").strip().lower()
             if lang and lang not in lang_allow:
                 continue
 
@@ -182,6 +780,7 @@ def main():
     ap.add_argument("--sci-pattern", default=r"(?i)^(saintpaulia(\b|$)|streptocarpus\s+ionanth)", help="Regex for scientific-name match (default matches Saintpaulia* and Streptocarpus ionanth-)")
     ap.add_argument("--vern-pattern", default=r"(?i)\bafrican\s+violet", help="Regex for vernacular-name match")
     ap.add_argument("--lang", default="en,eng", help="Comma-separated allowed language codes for vernaculars (empty = no filter)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the scans (1 = single process)")
     args = ap.parse_args()
 
     taxon_path = os.path.join(args.dir, "Taxon.tsv")
@@ -197,52 +796,86 @@ def main():
     vern_regex = re.compile(args.vern_pattern)
     lang_allow = set([s.strip().lower() for s in args.lang.split(",") if s.strip()]) if args.lang.strip() else None
 
-    print("Scanning Taxon.tsv (Plantae, species, scientific-name matches)...")
-    sci_matches, taxon_index = scan_taxon(taxon_path, sci_regex)
-    sci_ids = set(sci_matches.keys())
-    print(f"  Scientific-name hits: {len(sci_ids):,}")
-
-    vern_matches = {}
-    vern_ids = set()
-    if os.path.exists(vern_path):
-        print("Scanning VernacularName.tsv (vernacular-name matches)...")
-        vern_matches = scan_vernacular(vern_path, vern_regex, lang_allow=lang_allow)
-        vern_ids = set(vern_matches.keys())
-        print(f"  Vernacular-name hits: {len(vern_ids):,}")
+    # Both files are independent and each is sharded on newline-aligned byte ranges;
+    # with a pool, every shard of both scans is in flight at once.
+    has_vern = os.path.exists(vern_path)
+    taxon_jobs = [(taxon_path, sci_regex, a, b) for a, b in byte_shards(taxon_path, sci_regex, args.workers)]
+    vern_jobs = ([(vern_path, vern_regex, lang_allow, a, b) for a, b in byte_shards(vern_path, vern_regex, args.workers)]
+                 if has_vern else [])
+    use_pool = args.workers > 1 and len(taxon_jobs) + len(vern_jobs) > 1
+    with (multiprocessing.Pool(args.workers) if use_pool else contextlib.nullcontext()) as pool:
+        if pool is not None:
+            taxon_async = pool.starmap_async(scan_taxon, taxon_jobs)
+            vern_async = pool.starmap_async(scan_vernacular, vern_jobs)
+
+        print("Scanning Taxon.tsv (Plantae, species, scientific-name matches)...")
+        taxon_parts = taxon_async.get() if pool is not None else [scan_taxon(*j) for j in taxon_jobs]
+        sci_matches = TaxonTable()
+        needed: Set[int] = set()
+        for part_matches, part_needed in taxon_parts:  # file order, so later rows still win
+            sci_matches.update(part_matches)
+            needed |= part_needed
+        sci_ids = set(sci_matches.pos_by_id)
+        print(f"  Scientific-name hits: {len(sci_ids):,}")
+
+        vern_matches: Dict[int, List[str]] = {}
+        vern_ids = set()
+        if has_vern:
+            print("Scanning VernacularName.tsv (vernacular-name matches)...")
+            vern_parts = vern_async.get() if pool is not None else [scan_vernacular(*j) for j in vern_jobs]
+            for part in vern_parts:
+                for uid, names in part.items():
+                    vern_matches.setdefault(uid, []).extend(names)
+            vern_ids = set(vern_matches.keys())
+            print(f"  Vernacular-name hits: {len(vern_ids):,}")
 
     all_ids = sci_ids | vern_ids
     if not all_ids:
         print("No matches found.")
         return
 
-    print("\n=== Matches (by usage/taxon ID) ===\n")
-    for uid in sorted(all_ids):
-        row = taxon_index.get(uid, {})
-        sci = row.get("canonicalName") or row.get("scientificName") or ""
-        rank = (row.get("rank") or "").lower()
-        kingdom = row.get("kingdom") or ""
-        acc = row.get("acceptedNameUsageID")
+    print("Resolving matched + accepted usages in Taxon.tsv...")
+    taxon_index = build_index_subset(taxon_path, needed | all_ids, seed=sci_matches)
 
-        print(f"ID: {uid}")
-        print(f"  Scientific: {sci or '(unknown)'}")
-        print(f"  Kingdom/Rank: {kingdom or '?'} / {rank or '?'}")
+    print("\n=== Matches (by usage/taxon ID) ===\n")
+    # Records are assembled as strings and written in blocks rather than print()ed line by line
+    t = taxon_index
+    out: List[str] = []
+    for n, uid in enumerate(sorted(all_ids), 1):
+        p = t.pos(uid)
+        if p is not None:
+            sci = t.canonicals[p] or t.scinames[p]
+            rank = t.ranks[p].lower()
+            kingdom = t.kingdoms[p]
+            acc = t.accepted_id(p)
+        else:
+            sci = rank = kingdom = ""
+            acc = None
+
+        out.append(f"ID: {uid}\n")
+        out.append(f"  Scientific: {sci or '(unknown)'}\n")
+        out.append(f"  Kingdom/Rank: {kingdom or '?'} / {rank or '?'}\n")
 
         if uid in sci_ids:
-            print("  Source: Taxon.tsv (scientific match)")
+            out.append("  Source: Taxon.tsv (scientific match)\n")
 
         vlist = vern_matches.get(uid)
         if vlist:
             uniq = sorted(set(vlist), key=lambda s: s.lower())
             preview = "; ".join(uniq[:6]) + (" ..." if len(uniq) > 6 else "")
-            print(f"  Vernaculars: {preview}")
+            out.append(f"  Vernaculars: {preview}\n")
 
-        if acc and acc != "" and str(acc).isdigit() and int(acc) != uid:
-            acc_row = taxon_index.get(int(acc), {})
-            acc_name = acc_row.get("canonicalName") or acc_row.get("scientificName") or "(unknown)"
-            print(f"  Accepted usage ID: {acc}  →  {acc_name}")
+        if acc is not None and acc != uid:
+            q = t.pos(acc)
+            acc_name = (t.canonicals[q] or t.scinames[q]) if q is not None else ""
+            out.append(f"  Accepted usage ID: {acc}  →  {acc_name or '(unknown)'}\n")
 
-        print()
+        out.append("\n")
+        if n % 1000 == 0:
+            sys.stdout.write("".join(out))
+            out.clear()
 
+    sys.stdout.write("".join(out))
     print("Done.")
 
 if __name__ == "__main__":
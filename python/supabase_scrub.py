@@ -8,17 +8,24 @@ Env (required):
   SUPABASE_URL
   SUPABASE_SERVICE_ROLE
 
+Env (optional):
+  SUPABASE_DB_URL   direct Postgres DSN; with psycopg installed, --backup-csv is one COPY
+
 Install:
   pip install python-dotenv supabase
+  pip install "psycopg[binary]"   # optional, for COPY backups
 
 Usage:
   # Dry run: count rows that would be updated
   python scrub_care_temp_supabase.py
 
-  # Execute (perform updates) in batches of 1000
-  python scrub_care_temp_supabase.py --execute --batch 1000
+  # Execute: one server-side UPDATE via the scrub RPC (falls back to batches if it fails)
+  python scrub_care_temp_supabase.py --execute
+
+  # Execute in client-side batches of 5000, 4 in flight
+  python scrub_care_temp_supabase.py --execute --paged --batch 5000 --concurrency 4
 
-  # Backup matching rows before updating
+  # Backup matching rows before updating (COPY + RPC when SUPABASE_DB_URL is set)
   python scrub_care_temp_supabase.py --backup-csv backup.csv --execute
 """
 
@@ -26,14 +33,34 @@ import os
 import csv
 import time
 import argparse
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Dict, Any
 
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+try:
+    import psycopg  # optional: streams --backup-csv with COPY instead of paged selects
+except ImportError:
+    psycopg = None
+
 TABLE = "plants"
 COLUMN = "care_temp_humidity"
 
+# Whole scrub as one statement on the server (no id paging round-trips):
+#   create or replace function scrub_care_temp_humidity() returns bigint
+#   language sql as $$
+#     with u as (
+#       update plants set care_temp_humidity = null
+#       where care_temp_humidity is not null
+#       returning 1
+#     )
+#     select count(*) from u;
+#   $$;
+SCRUB_RPC = os.getenv("SCRUB_RPC", "scrub_care_temp_humidity")
+
 
 def get_sb() -> Client:
     load_dotenv()
@@ -42,22 +69,43 @@ def get_sb() -> Client:
     return create_client(url, key)
 
 
+_local = threading.local()
+
+
+def _thread_sb() -> Client:
+    # one client per worker thread; clients aren't shared across threads
+    sb = getattr(_local, "sb", None)
+    if sb is None:
+        sb = _local.sb = get_sb()
+    return sb
+
+
 def parse_args() -> argparse.Namespace:
     ap = argparse.ArgumentParser(description=f"Null out {COLUMN} for any row where it is set.")
-    ap.add_argument("--batch", type=int, default=1000, help="Rows per batch (default: 1000)")
+    ap.add_argument("--batch", type=int, default=5000, help="Rows per batch (default: 5000)")
+    ap.add_argument("--concurrency", type=int, default=4, help="Update requests in flight (default: 4)")
     ap.add_argument("--sleep", type=float, default=0.05, help="Sleep seconds between batches (default: 0.05)")
     ap.add_argument("--backup-csv", help="Path to write a CSV backup of rows before updating.")
     ap.add_argument("--execute", action="store_true", help="Apply changes. Without this flag, runs as a dry run.")
+    ap.add_argument("--paged", action="store_true", help=f"Update in client-side batches instead of the {SCRUB_RPC} RPC.")
     return ap.parse_args()
 
 
-def fetch_target_ids(sb: Client, batch: int, after_id: str | None) -> List[str]:
+BACKUP_COLS = ["id", COLUMN]
+
+
+def fetch_target_rows(sb: Client, batch: int, after_id: str | None, cols: str = "id") -> List[Dict[str, Any]]:
     """
-    Returns up to `batch` ids with care_temp_humidity NOT NULL, ordered by id ASC (keyset).
+    Returns up to `batch` rows (`cols`) with care_temp_humidity NOT NULL, ordered by id ASC (keyset).
+
+    Back it with a partial index so each page is an O(batch) index-only range scan that
+    only ever visits rows still to scrub (scrubbed rows drop out of the index):
+      create index if not exists plants_care_temp_humidity_set
+        on plants (id) where care_temp_humidity is not null;
     """
     q = (
         sb.table(TABLE)
-        .select("id")
+        .select(cols)
         .order("id", desc=False)
         .limit(batch)
         .not_.is_(COLUMN, "null")  # COLUMN IS NOT NULL
@@ -65,51 +113,64 @@ def fetch_target_ids(sb: Client, batch: int, after_id: str | None) -> List[str]:
     if after_id:
         q = q.gt("id", after_id)
     res = q.execute()
-    rows = getattr(res, "data", None) or []
-    return [r["id"] for r in rows]
+    return getattr(res, "data", None) or []
 
 
-def backup_rows(sb: Client, ids: List[str], path: str) -> None:
-    if not ids:
-        print("Backup: no rows to write (none matched).")
-        return
+def backup_rows(w: csv.DictWriter, rows: List[Dict[str, Any]]) -> int:
+    """Append one page's pre-images (fetched alongside its ids) to an open backup writer."""
+    for r in rows:
+        w.writerow({c: r.get(c) for c in BACKUP_COLS})
+    return len(rows)
 
-    cols = ["id", COLUMN]
-    to_write: List[Dict[str, Any]] = []
-    CHUNK = 1000
-    for i in range(0, len(ids), CHUNK):
-        chunk = ids[i : i + CHUNK]
-        res = sb.table(TABLE).select(",".join(cols)).in_("id", chunk).execute()
-        to_write.extend(getattr(res, "data", None) or [])
 
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=cols)
-        w.writeheader()
-        for r in to_write:
-            w.writerow({c: r.get(c) for c in cols})
-    print(f"Backup written: {path} ({len(to_write)} rows)")
+def copy_backup(dsn: str, path: str) -> int:
+    """
+    Write every matching row straight from Postgres with COPY ... TO STDOUT: one query,
+    CSV produced server-side, no id list or JSON round-trip. Returns rows written.
+    """
+    cols = ", ".join(BACKUP_COLS)
+    query = (
+        f"COPY (SELECT {cols} FROM {TABLE} WHERE {COLUMN} IS NOT NULL ORDER BY id) "
+        "TO STDOUT WITH (FORMAT csv, HEADER true)"
+    )
+    with psycopg.connect(dsn) as conn, conn.cursor() as cur, open(path, "wb") as f:
+        with cur.copy(query) as cp:
+            for chunk in cp:
+                f.write(chunk)
+        n = cur.rowcount
+    print(f"Backup written: {path} ({n} rows)")
+    return n
 
 
 def update_batch(sb: Client, ids: List[str], dry_run: bool) -> int:
+    """
+    Null COLUMN for one keyset page. The page is addressed by its id bounds plus the same
+    NOT NULL filter that selected it, so the PATCH URL stays constant-size whatever the
+    batch (an id IN (...) list caps batches at what fits in a URL).
+    """
     if not ids:
         return 0
     if dry_run:
         return len(ids)
-    sb.table(TABLE).update({COLUMN: None}).in_("id", ids).execute()
+    (
+        sb.table(TABLE)
+        .update({COLUMN: None}, returning="minimal")
+        .not_.is_(COLUMN, "null")
+        .gte("id", ids[0])
+        .lte("id", ids[-1])
+        .execute()
+    )
     return len(ids)
 
 
-def collect_all_matching_ids(sb: Client, batch: int) -> List[str]:
-    """Collect all matching ids (for backup or to report a full count)."""
-    all_ids: List[str] = []
-    cursor = None
-    while True:
-        got = fetch_target_ids(sb, batch, cursor)
-        if not got:
-            break
-        all_ids.extend(got)
-        cursor = got[-1]
-    return all_ids
+def scrub_rpc(sb: Client) -> int | None:
+    """Run the whole scrub server-side. Returns rows updated, or None if the RPC failed."""
+    try:
+        res = sb.rpc(SCRUB_RPC, {}).execute()
+    except Exception as e:
+        print(f"WARN: {SCRUB_RPC} RPC failed ({e}); falling back to batched updates.")
+        return None
+    return int(getattr(res, "data", None) or 0)
 
 
 def main():
@@ -117,37 +178,73 @@ def main():
     sb = get_sb()
     dry_run = not args.execute
 
-    # If backing up, gather all ids first and snapshot
-    if args.backup_csv:
-        print("Collecting ids for backup…")
-        all_ids = collect_all_matching_ids(sb, args.batch)
-        if not all_ids:
-            print("No matching rows found; nothing to back up.")
-        else:
-            backup_rows(sb, all_ids, args.backup_csv)
+    # If backing up: one COPY up front when we can reach Postgres directly, else each
+    # page is fetched with its pre-images and written out before its update is queued
+    dsn = os.getenv("SUPABASE_DB_URL")
+    paged_backup = bool(args.backup_csv) and not (dsn and psycopg is not None)
+    if args.backup_csv and not paged_backup:
+        print("Copying matching rows for backup…")
+        copy_backup(dsn, args.backup_csv)
+
+    # Once pre-images are on disk (or none were asked for) the scrub itself can be handed
+    # to the server; only a paged backup needs each page updated behind its write.
+    if args.execute and not paged_backup and not args.paged:
+        started = time.time()
+        n = scrub_rpc(sb)
+        if n is not None:
+            print(f"Done. Total rows updated: {n:,} in {time.time() - started:.1f}s (rpc={SCRUB_RPC}).")
+            return
+    page_cols = ",".join(BACKUP_COLS) if paged_backup else "id"
+    backed_up = 0
 
     total = 0
     batches = 0
     cursor = None
     started = time.time()
 
-    while True:
-        ids = fetch_target_ids(sb, args.batch, cursor)
-        if not ids:
-            break
-        cursor = ids[-1]
-        n = update_batch(sb, ids, dry_run)
-        total += n
-        batches += 1
-        print(
-            f"\rBatches: {batches:,}  last_id: {cursor}  batch_size: {len(ids):,}  "
-            f"{'would_update' if dry_run else 'updated'}: {n:,}",
-            end="",
-            flush=True,
-        )
-        if args.sleep:
-            time.sleep(args.sleep)
-
+    def report(done) -> None:
+        nonlocal total, batches
+        for fut in done:
+            ids = pending.pop(fut)
+            n = fut.result()
+            total += n
+            batches += 1
+            print(
+                f"\rBatches: {batches:,}  last_id: {ids[-1]}  batch_size: {len(ids):,}  "
+                f"{'would_update' if dry_run else 'updated'}: {n:,}",
+                end="",
+                flush=True,
+            )
+
+    # This thread pages ids (the keyset cursor doesn't depend on updates landing);
+    # up to --concurrency updates run behind it.
+    pending: Dict[Any, List[str]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as ex, \
+            (open(args.backup_csv, "w", newline="", encoding="utf-8") if paged_backup
+             else contextlib.nullcontext()) as backup_f:
+        backup_w = None
+        if backup_f is not None:
+            backup_w = csv.DictWriter(backup_f, fieldnames=BACKUP_COLS)
+            backup_w.writeheader()
+        while True:
+            rows = fetch_target_rows(sb, args.batch, cursor, page_cols)
+            if not rows:
+                break
+            ids = [r["id"] for r in rows]
+            cursor = ids[-1]
+            if backup_w is not None:
+                backed_up += backup_rows(backup_w, rows)
+                backup_f.flush()  # pre-images hit disk before their update is sent
+            if len(pending) >= max(1, args.concurrency):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                report(done)
+            pending[ex.submit(lambda b: update_batch(_thread_sb(), b, dry_run), ids)] = ids
+            if args.sleep:
+                time.sleep(args.sleep)
+        report(wait(pending).done)
+
+    if paged_backup:
+        print(f"\nBackup written: {args.backup_csv} ({backed_up} rows)", end="")
     dur = time.time() - started
     print("\nDone.")
     print(f"Total rows {'to update' if dry_run else 'updated'}: {total:,} in {dur:.1f}s (batch={args.batch}).")
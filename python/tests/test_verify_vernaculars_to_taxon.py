@@ -0,0 +1,80 @@
+"""Tests for verify_vernaculars_to_taxon. Run: python -m unittest discover python/tests"""
+
+import contextlib, csv, io, os, sys, tempfile, unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import verify_vernaculars_to_taxon as vv
+
+TAXON = [
+    ["taxonID", "acceptedNameUsageID", "scientificName", "taxonRank", "taxonomicStatus"],
+    ["1", "", "Saintpaulia ionantha H.Wendl.", "species", "accepted"],
+    ["2", "1", "Saintpaulia kewensis C.B.Clarke", "species", "synonym"],
+    ["3", "", "Dimorphotheca ecklonis DC.", "species", "accepted"],
+]
+VERN = [
+    ["taxonID", "vernacularName", "language"],
+    ["1", "African violet", "en"],
+    ["1", "Usambara violet", "en"],
+    ["2", "AFRICAN VIOLET", "en"],
+    ["2", "Usambara-Veilchen", "de"],
+    ["3", "African daisy", "en"],
+    ["3", "Cape marguerite", "en"],
+]
+
+
+def run(*argv: str):
+    """Rows of the output CSV from main() over the fixture dump."""
+    with tempfile.TemporaryDirectory() as d:
+        for name, rows in (("Taxon.tsv", TAXON), ("VernacularName.tsv", VERN)):
+            with open(os.path.join(d, name), "w", encoding="utf-8") as f:
+                f.writelines("\t".join(r) + "\n" for r in rows)
+        out = os.path.join(d, "out.csv")
+        with mock.patch.object(sys, "argv", ["verify", "--dir", d, "--out", out, *argv]), \
+                contextlib.redirect_stdout(io.StringIO()):
+            vv.main()
+        if not os.path.exists(out):
+            return []
+        with open(out, encoding="utf-8", newline="") as f:
+            return list(csv.reader(f))
+
+
+class CasefoldPatternTest(unittest.TestCase):
+    def test_lowercases_literals(self):
+        self.assertEqual(vv.casefold_pattern(r"\bAfrican\s+VIOLET"), r"\bafrican\s+violet")
+
+    def test_code_escapes_keep_ignorecase(self):
+        # each spells an uppercase A, which lowercased names never contain
+        expected = run("--pattern", "african")
+        self.assertEqual(len(expected) - 1, 3)
+        for pattern in (
+            r"\x41frican",
+            r"\u0041frican",
+            r"\U00000041frican",
+            r"\N{LATIN CAPITAL LETTER A}frican",
+            r"\101frican",
+            r"[\x41-\x5a]frican",
+        ):
+            with self.subTest(pattern=pattern):
+                self.assertIsNone(vv.casefold_pattern(pattern))
+                self.assertEqual(run("--pattern", pattern), expected)
+
+
+class MustContainTest(unittest.TestCase):
+    def test_plain_scan(self):
+        with mock.patch.object(vv, "pa", None):
+            rows = run("--must-contain", "usambara")
+        self.assertEqual([r[1] for r in rows[1:]], ["Usambara violet"])
+
+    @unittest.skipIf(vv.pa is None, "pyarrow not installed")
+    def test_arrow_scan_matches_plain_scan(self):
+        # the default pattern is ASCII, so the Arrow path runs it as an RE2 kernel
+        for argv in (("--must-contain", "usambara"), ("--must-contain", "violet", "--ascii-regex")):
+            with self.subTest(argv=argv):
+                with mock.patch.object(vv, "pa", None):
+                    plain = run(*argv)
+                self.assertEqual(run(*argv), plain)
+
+
+if __name__ == "__main__":
+    unittest.main()
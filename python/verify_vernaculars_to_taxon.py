@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import argparse, csv, io, os, sys, re
-from typing import Dict, List, Optional, Tuple, Any, Set
+import argparse, csv, hashlib, io, mmap, os, sys, re, tempfile
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple, Any, Set
 
 # Make csv robust to very large fields
 _MAX = sys.maxsize
@@ -13,22 +15,562 @@ while True:
     except OverflowError:
         _MAX = int(_MAX / 10)
 
-def open_tsv(path: str) -> csv.DictReader:
+# Where taxon_key_index keeps its per-Taxon.tsv key -> line offset index
+CACHE_DIR = os.getenv("PLANTER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "planter"))
+
+try:
+    import pyarrow as pa  # optional: vectorized VernacularName.tsv prefilter
+    import pyarrow.compute as pc
+    import pyarrow.csv as pv
+except ImportError:
+    pa = None
+
+def _iter_lines(path: str, window: int = 1 << 24) -> Iterator[bytes]:
+    """
+    Raw lines (without b"\\n") of a file, sliced out of an mmap a window at a time so only
+    one window's worth of lines is ever materialized.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = 0
+            while pos < size:
+                end = min(pos + window, size)
+                if end < size:  # extend to the end of the line the window stops in
+                    nl = mm.find(b"\n", end - 1)
+                    end = size if nl < 0 else nl + 1
+                lines = mm[pos:end].split(b"\n")
+                if not lines[-1]:
+                    lines.pop()
+                yield from lines
+                pos = end
+
+def open_tsv_indexed(path: str, wanted: List[Tuple[str, ...]]) -> Tuple[Iterator[List[bytes]], List[int]]:
+    """
+    Rows of a TSV as lists of raw bytes cells, plus, for each alias tuple in `wanted`, the
+    index of its column (exact header match first, then case-insensitive; -1 if absent).
+    GBIF dumps are unquoted, so lines are split on tabs directly instead of going through
+    the csv module, and callers decode (_cell) only the cells they actually use.
+    """
+    lines = _iter_lines(path)
     # errors="replace" so we never crash on odd bytes
-    f = open(path, "r", encoding="utf-8", errors="replace", newline="")
-    return csv.DictReader(f, delimiter="\t")
+    header = next(lines, b"").decode("utf-8", "replace").rstrip("\r").split("\t")
+    reader = (line.rstrip(b"\r").split(b"\t") for line in lines)
+    return reader, _resolve_cols(header, wanted)
+
+def _resolve_cols(header: List[str], wanted: List[Tuple[str, ...]]) -> List[int]:
+    exact = {h: i for i, h in enumerate(header)}
+    low = {h.lower(): i for i, h in enumerate(header)}
+    idxs: List[int] = []
+    for aliases in wanted:
+        i = next((exact[a] for a in aliases if a in exact), None)
+        if i is None:
+            i = next((low[a.lower()] for a in aliases if a.lower() in low), -1)
+        idxs.append(i)
+    return idxs
+
+def _raw(row: List[bytes], i: int) -> bytes:
+    return row[i] if 0 <= i < len(row) else b""
+
+def _cell(row: List[bytes], i: int) -> str:
+    return row[i].decode("utf-8", "replace") if 0 <= i < len(row) else ""
+
+def casefold_pattern(pattern: str) -> Optional[str]:
+    """
+    Lowercase the literal letters of an ASCII regex (escapes like \\S or \\B are left alone)
+    so it can run case-sensitively against lowercased text instead of with IGNORECASE.
+    None when that isn't a safe rewrite (non-ASCII, inline flags or other (?...) syntax,
+    or escapes that spell a character by code, like \\x41, \\N{...} or octal, which may
+    stand for an uppercase letter).
+    """
+    if not pattern.isascii() or re.search(r"\(\?(?!:)", pattern):
+        return None
+    out: List[str] = []
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            if pattern[i + 1:i + 2] in ("x", "u", "U", "N") or pattern[i + 1:i + 2].isdigit():
+                return None
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        out.append(pattern[i].lower())
+        i += 1
+    return "".join(out)
+
+def _balanced(pattern: str) -> bool:
+    """True if every ( in pattern (outside escapes and [...] classes) is closed in order."""
+    depth, in_class, i = 0, False, 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 1
+        elif in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+            if pattern[i + 1:i + 2] == "^":
+                i += 1
+            if pattern[i + 1:i + 2] == "]":
+                i += 1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth < 0:
+                return False
+        i += 1
+    return depth == 0
+
+def required_literals(pattern: str) -> Optional[Tuple[str, ...]]:
+    """
+    One literal substring per top-level alternative of a (case-folded) ASCII pattern that
+    any match of that alternative must contain, e.g. the default pattern gives
+    ("african", "usambara"). A name containing none of them can't match, so a plain
+    `in` test can reject it before the regex runs. None if some alternative has no
+    unconditional literal run (only text outside groups/classes counts).
+    """
+    # \b(?:...)\b around the whole pattern: the literals are those of the group's body
+    inner = re.fullmatch(r"(?:\\b|\^)*\(\?:(.*)\)(?:\\b|\$)*", pattern)
+    if inner and _balanced(inner.group(1)):
+        pattern = inner.group(1)
+
+    alts: List[List[str]] = [[]]          # literal runs per alternative
+    run: List[str] = []
+    depth, in_class, i = 0, False, 0
+
+    def end_run(optional_last: bool = False) -> None:
+        lit = "".join(run[:-1] if optional_last else run)
+        if lit:
+            alts[-1].append(lit)
+        run.clear()
+
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            end_run()
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            end_run()
+            in_class = True
+            if pattern[i + 1:i + 2] == "^":
+                i += 1
+            if pattern[i + 1:i + 2] == "]":
+                i += 1
+        elif c == "(":
+            end_run()
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif depth == 0 and c == "|":
+            end_run()
+            alts.append([])
+        elif c == "{":
+            if depth == 0:
+                end_run(optional_last=True)
+            close = pattern.find("}", i)
+            i = close if close > 0 else i
+        elif depth == 0 and (c.isalnum() or c in " _"):
+            run.append(c)
+        elif depth == 0:
+            end_run(optional_last=c in "?*{")
+        i += 1
+    end_run()
+
+    best = [max(runs, key=len) for runs in alts if runs]
+    if len(best) != len(alts):
+        return None
+    return tuple(dict.fromkeys(best))
+
+KEY_COLS = ("taxonKey", "taxonID", "taxonId", "usageKey", "usageID")
+
+TAXON_COLS = [
+    KEY_COLS,
+    ("taxonRank", "rank"),
+    ("taxonomicStatus", "status"),
+    ("canonicalName",),
+    ("scientificName",),
+    ("acceptedTaxonKey", "acceptedTaxonID", "acceptedNameUsageID", "acceptedNameUsageKey"),
+]
+
+VERN_COLS = [
+    KEY_COLS,
+    ("vernacularName", "vernacularname"),
+    ("language",),
+    ("languageCode",),
+    ("countryCode", "country"),
+    ("isPreferredName", "preferred", "isPreferred"),
+]
+
+VernRow = Tuple[str, str, str, str, str, str]
+
+# The only non-ASCII characters IGNORECASE ever matches to an ASCII letter (Python's `re`
+# special-cases these; Unicode mode for İ/ı/ſ, both modes' lowering for K). Non-ASCII names
+# are mapped through this before a needle test so it stays a superset of the regex.
+_FOLD_ASCII = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+_FOLD_ASCII_RE = "[\u0130\u0131\u017f\u212a]"
+
+def _has_needle(name: str, needles: Tuple[str, ...]) -> bool:
+    """True if the (case-insensitive) name contains one of `needles`."""
+    nl = name.lower() if name.isascii() else name.translate(_FOLD_ASCII).lower()
+    for needle in needles:
+        if needle in nl:
+            return True
+    return False
+
+def iter_vern_candidates(path: str, needles: Optional[Tuple[str, ...]]) -> Iterator[VernRow]:
+    """
+    VERN_COLS cells of every row with a non-empty name containing one of `needles`
+    (case-insensitively; every row when None). The name comes back stripped.
+    """
+    reader, (i_key, i_name, i_lang, i_lcode, i_country, i_pref) = open_tsv_indexed(path, VERN_COLS)
+    for row in reader:
+        name = _cell(row, i_name).strip()
+        if not name:
+            continue
+        if needles is not None and not _has_needle(name, needles):
+            continue
+        yield (
+            _cell(row, i_key),
+            name,
+            _cell(row, i_lang),
+            _cell(row, i_lcode),
+            _cell(row, i_country),
+            _cell(row, i_pref),
+        )
 
-def _get(row: dict, *keys: str) -> Optional[str]:
-    """Case-insensitive column getter."""
+def re2_pattern(pattern: str) -> str:
+    """
+    An ASCII-mode `re` pattern for RE2 (pyarrow's regex kernels), whose \\s lacks \\v:
+    every \\s also admits \\x0b, so RE2 never rejects a name `re` would accept.
+    """
+    out: List[str] = []
+    in_class, i = False, 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            esc = pattern[i:i + 2]
+            if esc == "\\s":
+                esc = "\\s\\x0b" if in_class else "[\\s\\x0b]"
+            out.append(esc)
+            i += 2
+            continue
+        out.append(c)
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+            for lead in "^]":
+                if pattern[i + 1:i + 2] == lead:
+                    out.append(lead)
+                    i += 1
+        i += 1
+    return "".join(out)
+
+def iter_vern_candidates_arrow(path: str, needles: Optional[Tuple[str, ...]],
+                               regex: Optional[str] = None) -> Iterator[VernRow]:
+    """
+    Same rows as iter_vern_candidates, parsed into Arrow record batches by pyarrow. The
+    needle test (and, given `regex`, an RE2 match of the lowercased, stripped names) runs as
+    a vectorized kernel over each batch's name column and only the rows that pass are
+    converted to Python strings, where the needle test is repeated exactly (the kernels
+    fold case a little differently). Raises pa.ArrowInvalid on rows pyarrow can't parse
+    (ragged lines, bad UTF-8) or a regex RE2 rejects, possibly after some rows have been
+    yielded.
+    """
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8", "replace").rstrip("\r\n").split("\t")
+    idxs = _resolve_cols(header, VERN_COLS)
+    if idxs[1] < 0:
+        return
+    cols = list(dict.fromkeys(header[i] for i in idxs if i >= 0))
+    slots = [cols.index(header[i]) if i >= 0 else -1 for i in idxs]
+    i_name = slots[1]
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(block_size=1 << 24),
+        # GBIF dumps are unquoted: a '"' inside a name is just a character
+        parse_options=pv.ParseOptions(delimiter="\t", quote_char=False),
+        convert_options=pv.ConvertOptions(
+            include_columns=cols,
+            column_types={c: pa.string() for c in cols},
+            strings_can_be_null=False,
+        ),
+    )
+    for batch in reader:
+        names = batch.column(i_name)
+        if needles is None:
+            mask = pc.not_equal(names, "")
+        else:
+            mask = None
+            for needle in needles:
+                hit = pc.match_substring(names, needle, ignore_case=True)
+                mask = hit if mask is None else pc.or_(mask, hit)
+        if regex is not None:
+            hit = pc.match_substring_regex(pc.utf8_lower(pc.utf8_trim_whitespace(names)), regex)
+            mask = hit if needles is None else pc.and_(mask, hit)
+        if regex is not None or needles is not None:
+            # the kernels fold İ/ı (and lowercase K) differently from `re`; let Python decide
+            mask = pc.or_(mask, pc.match_substring_regex(names, _FOLD_ASCII_RE))
+        hits = batch.filter(mask)
+        if not hits.num_rows:
+            continue
+        data = [hits.column(j).to_pylist() for j in range(hits.num_columns)]
+        empty = [""] * hits.num_rows
+        key, name, lang, lcode, country, pref = (data[j] if j >= 0 else empty for j in slots)
+        for row in zip(key, name, lang, lcode, country, pref):
+            n = row[1].strip()
+            if n and (needles is None or _has_needle(n, needles)):
+                yield (row[0], n) + row[2:]
+
+def _digit_trie(keys: Iterator[str]) -> str:
+    """Regex source matching exactly the given digit strings, factored as a trie."""
+    trie: dict = {}
     for k in keys:
-        if k in row and row[k] is not None:
-            return str(row[k])
-    low = {k.lower(): k for k in row.keys()}
+        node = trie
+        for ch in k:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        alts = [ch + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return emit(trie)
+
+KeyIndex = Tuple[array, array]  # (sorted int64 keys, byte offset of each key's line)
+
+def open_tsv_with_keys(path: str, wanted: List[Tuple[str, ...]], keys: Set[int],
+                       key_index: Optional[KeyIndex] = None) -> Tuple[Iterator[List[bytes]], List[int]]:
+    """
+    Like open_tsv_indexed, but only (a superset of) the rows whose integer key column
+    (wanted[0]) is in `keys`. With a key_index the rows are read straight from their
+    offsets; otherwise a bytes regex built from the keys finds those lines over an mmap, so
+    the per-line loop runs inside the regex engine and only hits are split. Callers still
+    re-check the parsed key. Falls back to every row when the key column is missing or
+    some key is negative.
+    """
+    reader, idxs = open_tsv_indexed(path, wanted)
+    i_key = idxs[0]
+    if i_key < 0 or any(k < 0 for k in keys):
+        return reader, idxs
+    reader.close()
+    if not keys:
+        return iter(()), idxs
+    if key_index is not None:
+        return _rows_at(path, _offsets_of(key_index, keys)), idxs
+    # anchored on the preceding b"\n" rather than ^/MULTILINE: a literal first byte lets the
+    # engine skip ahead to candidate line starts instead of trying every position
+    rx = re.compile(
+        (r"\n(?:[^\t\n]*\t){%d}[ \f\v]*\+?0*(?:%s)[ \f\v]*(?=[\t\r\n]|\Z)"
+         % (i_key, _digit_trie(str(k) for k in keys))).encode("ascii")
+    )
+
+    def rows() -> Iterator[List[bytes]]:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            header_end = mm.find(b"\n")
+            if header_end < 0:
+                return
+            for m in rx.finditer(mm, header_end):
+                end = mm.find(b"\n", m.end())
+                yield mm[m.start() + 1:end if end >= 0 else size].rstrip(b"\r").split(b"\t")
+
+    return rows(), idxs
+
+def _offsets_of(key_index: KeyIndex, keys: Set[int]) -> List[int]:
+    ks, offs = key_index
+    hits: List[int] = []
     for k in keys:
-        kk = low.get(k.lower())
-        if kk and row[kk] is not None:
-            return str(row[kk])
-    return None
+        i = bisect_left(ks, k)
+        while i < len(ks) and ks[i] == k:
+            hits.append(offs[i])
+            i += 1
+    hits.sort()  # file order, so a repeated key still ends on its last row
+    return hits
+
+def _rows_at(path: str, offsets: List[int]) -> Iterator[List[bytes]]:
+    if not offsets:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        for off in offsets:
+            end = mm.find(b"\n", off)
+            yield mm[off:end if end >= 0 else size].rstrip(b"\r").split(b"\t")
+
+def taxon_key_index(path: str, build: bool = False, refresh: bool = False) -> Optional[KeyIndex]:
+    """
+    Every non-negative integer key of Taxon.tsv with the offset of its line, sorted by key,
+    cached under CACHE_DIR keyed by the file's size, mtime and header, so re-runs against
+    the same dump (e.g. with another --pattern) find their rows by bisection instead of
+    scanning the file. An existing cache is always used; building one (build/refresh) is
+    opt-in, since it's a Python-level pass over every row and holds every key, unlike the
+    target-sized scan. None if there is no key column or no cache to use.
+    """
+    with open(path, "rb") as f:
+        header_b = f.readline()
+        st = os.fstat(f.fileno())
+    header = header_b.decode("utf-8", "replace").rstrip("\r\n").split("\t")
+    i_key = _resolve_cols(header, [KEY_COLS])[0]
+    if i_key < 0 or st.st_size == 0:
+        return None
+    fp = hashlib.sha1(b"%d:%d:%d:" % (st.st_size, st.st_mtime_ns, i_key) + header_b).hexdigest()
+    cache = os.path.join(CACHE_DIR, f"taxon-{fp}.idx")
+
+    if not refresh and os.path.exists(cache):
+        try:
+            with open(cache, "rb") as f:
+                n = array("q")
+                n.fromfile(f, 1)
+                ks, offs = array("q"), array("q")
+                ks.fromfile(f, n[0])
+                offs.fromfile(f, n[0])
+            return ks, offs
+        except (OSError, EOFError) as e:
+            print(f"WARN: unreadable Taxon.tsv index cache {cache} ({e})")
+    if not (build or refresh):
+        return None
+
+    print("Taxon.tsv: indexing keys (cached for later runs)…")
+    rx = re.compile(rb"\n(?:[^\t\n]*\t){%d}[ \f\v]*\+?(\d+)[ \f\v]*(?=[\t\r\n]|\Z)" % i_key)
+    ks, offs = array("q"), array("q")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in rx.finditer(mm, len(header_b) - 1):
+            ks.append(int(m.group(1)))
+            offs.append(m.start() + 1)
+    # GBIF dumps are mostly in key order already; only sort when they aren't
+    if any(ks[i] > ks[i + 1] for i in range(len(ks) - 1)):
+        order = sorted(range(len(ks)), key=ks.__getitem__)
+        ks = array("q", (ks[i] for i in order))
+        offs = array("q", (offs[i] for i in order))
+
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            array("q", [len(ks)]).tofile(f)
+            ks.tofile(f)
+            offs.tofile(f)
+        os.replace(tmp, cache)
+    except OSError as e:
+        print(f"WARN: could not write Taxon.tsv index cache {cache} ({e})")
+    return ks, offs
+
+NO_KEY = -(1 << 63)  # "no accepted key" slot in TaxonIndex.accepted
+
+class TaxonIndex:
+    """
+    Taxon metadata stored column-wise: one key -> position dict plus parallel arrays
+    (accepted keys as int64, names/rank/status as lists), instead of four dicts per key.
+    """
+    __slots__ = ("idx_of", "accepted", "ranks", "statuses", "canonicals", "scinames")
+
+    def __init__(self):
+        self.idx_of: Dict[int, int] = {}
+        self.accepted = array("q")
+        self.ranks: List[str] = []
+        self.statuses: List[str] = []
+        self.canonicals: List[str] = []
+        self.scinames: List[str] = []
+
+    def __contains__(self, k: int) -> bool:
+        return k in self.idx_of
+
+    def put(self, k: int, rank: str, status: str, can: str, sci: str) -> int:
+        """Store (or overwrite) k's names/rank/status; its accepted key is left as is."""
+        i = self.idx_of.get(k)
+        if i is None:
+            i = self.idx_of[k] = len(self.ranks)
+            self.accepted.append(NO_KEY)
+            self.ranks.append(rank)
+            self.statuses.append(status)
+            self.canonicals.append(can)
+            self.scinames.append(sci)
+        else:
+            self.ranks[i] = rank
+            self.statuses[i] = status
+            self.canonicals[i] = can
+            self.scinames[i] = sci
+        return i
+
+    def accepted_of(self, k: Optional[int]) -> Optional[int]:
+        i = self.idx_of.get(k)
+        if i is None or self.accepted[i] == NO_KEY:
+            return None
+        return self.accepted[i]
+
+    def accepted_keys(self) -> Set[int]:
+        return {a for a in self.accepted if a != NO_KEY}
+
+def scan_taxon(path: str, target_keys: Set[int], key_index: Optional[KeyIndex] = None) -> TaxonIndex:
+    """
+    Return a TaxonIndex of the target keys and the accepted keys they reference (only
+    targets carry an accepted key); a repeated key overwrites.
+
+    Taxon.tsv is searched for the target keys first, then for the accepted keys that weren't
+    among them. Both passes use open_tsv_with_keys, so the file is scanned by the regex
+    engine (or, given a key_index, not scanned at all) and only the few thousand hit rows
+    are split and parsed in Python.
+    """
+    index = TaxonIndex()
+
+    reader, (i_key, i_rank, i_status, i_can, i_sci, i_acc) = open_tsv_with_keys(path, TAXON_COLS, target_keys, key_index)
+
+    def key_of(row: List[bytes]) -> Optional[int]:
+        taxon_id = _raw(row, i_key)
+        if not taxon_id:
+            return None
+        try:
+            return int(taxon_id)
+        except Exception:
+            return None
+
+    def record(k: int, row: List[bytes]) -> int:
+        # rank/status have a few dozen distinct values; intern so rows share one str each
+        return index.put(
+            k,
+            sys.intern(_cell(row, i_rank).lower()),
+            sys.intern(_cell(row, i_status).lower()),
+            _cell(row, i_can).strip(),
+            _cell(row, i_sci).strip(),
+        )
+
+    for row in reader:
+        k = key_of(row)
+        if k is None or k not in target_keys:
+            continue
+        i = record(k, row)
+        acc = _raw(row, i_acc)
+        if acc:
+            try:
+                index.accepted[i] = int(acc)
+            except Exception:
+                pass
+
+    residual = {a for a in index.accepted_keys() if a not in index}
+    if residual:
+        print(f"Taxon.tsv: second pass for {len(residual)} accepted keys outside the matched set…")
+        reader, _ = open_tsv_with_keys(path, TAXON_COLS, residual, key_index)
+        for row in reader:
+            k = key_of(row)
+            if k is not None and k in residual:
+                record(k, row)
+                residual.discard(k)
+                if not residual:
+                    break
+
+    return index
+
+# Non-capturing; matched lowercased, with re.ASCII
+DEFAULT_PATTERN = r"\b(?:african[\s-]*violets?|usambara\s+violets?|false\s+african[\s-]*violets?)\b"
 
 SPECIES_LIKE = {
     "species", "nothospecies", "hybrid", "hybrid species",
@@ -45,9 +587,21 @@ def main():
     ap.add_argument("--out", default="vernacular_check.csv", help="Output CSV")
     ap.add_argument(
         "--pattern",
-        default=r"\bAfrican[\s-]*violet(s)?\b|\bUsambara\s+violet\b|\bfalse\s+African[\s-]*violet\b",
-        help="Regex to match vernacularName lines"
+        default=DEFAULT_PATTERN,
+        help="Regex to match vernacularName lines (the default is matched with --ascii-regex)"
     )
+    ap.add_argument("--ascii-regex", action="store_true",
+                    help="Compile --pattern with re.ASCII (ASCII-only \\b, \\s, \\w; faster)")
+    ap.add_argument("--must-contain",
+                    help="Substring (case-insensitive) every match contains; rows without it skip the regex. "
+                         "Derived from --pattern when possible")
+    ap.add_argument("--cache", action="store_true",
+                    help=f"Build a Taxon.tsv key index cache (in {CACHE_DIR}) if there isn't one; "
+                         "an existing one is used without this flag")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Ignore any Taxon.tsv key index cache")
+    ap.add_argument("--refresh-cache", action="store_true",
+                    help="Rebuild the Taxon.tsv key index cache even if one exists")
     ap.add_argument("--species-only", action="store_true",
                     help="If set, only keep results where Taxon rank is species-like")
     args = ap.parse_args()
@@ -63,160 +617,130 @@ def main():
     if not os.path.exists(args.taxon):
         sys.exit(f"Taxon.tsv not found: {args.taxon}")
 
-    rx = re.compile(args.pattern, re.IGNORECASE)
+    # match lowercased ASCII names against a lowercased pattern rather than using IGNORECASE;
+    # str.lower() doesn't fold like IGNORECASE outside ASCII (İ -> "i̇", ſ and ı stay put),
+    # so names with any non-ASCII character still go through the IGNORECASE regex
+    folded = casefold_pattern(args.pattern)
+    flags = re.ASCII if args.ascii_regex or args.pattern == DEFAULT_PATTERN else 0
+    search_ci = re.compile(args.pattern, flags | re.IGNORECASE).search
+    rx = re.compile(folded, flags) if folded is not None else None
+    folding = rx is not None
+    search = rx.search if folding else search_ci
+    # cheap `in` test ahead of the regex; most vernacular names contain none of these
+    if args.must_contain:
+        needles: Optional[Tuple[str, ...]] = (args.must_contain.lower(),)
+    else:
+        needles = required_literals(folded) if folding else None
 
     # -------- 1) Scan VernacularName.tsv for matches, collect keys --------
-    vern_rows: List[dict] = []
+    # Matched rows are spooled to a temp file (not held in memory through the Taxon scan)
+    # and read back in step 4; only the distinct keys stay resident.
+    spool = tempfile.TemporaryFile("w+", encoding="utf-8", newline="")
+    spool_w = csv.writer(spool, delimiter="\t")
     target_keys: Set[int] = set()
 
-    print("Scanning VernacularName.tsv for matches…")
-    v_reader = open_tsv(args.vern)
-    for row in v_reader:
-        name = (_get(row, "vernacularName", "vernacularname") or "").strip()
-        if not name: 
-            continue
-        if not rx.search(name):
-            continue
+    def spool_matches(candidates: Iterator[VernRow]) -> int:
+        n = 0
+        for row in candidates:
+            name = row[1]
+            if not (search(name.lower()) if folding and name.isascii() else search_ci(name)):
+                continue
+            # keep the row’s useful fields
+            spool_w.writerow(row)
+            n += 1
+
+            # stash key
+            try:
+                target_keys.add(int(row[0]))
+            except Exception:
+                pass
+        return n
 
-        # keep a small copy of the row’s useful fields
-        r = {
-            "taxonKey": _get(row, "taxonKey", "taxonID", "taxonId", "usageKey", "usageID") or "",
-            "vernacularName": name,
-            "language": _get(row, "language") or "",
-            "languageCode": _get(row, "languageCode") or "",
-            "countryCode": _get(row, "countryCode", "country") or "",
-            "isPreferredName": _get(row, "isPreferredName", "preferred", "isPreferred") or "",
-        }
-        vern_rows.append(r)
-
-        # stash key
-        tid = r["taxonKey"]
+    print("Scanning VernacularName.tsv for matches…")
+    matched = None
+    if pa is not None:
+        # ASCII-mode patterns run as RE2 in the kernel; `re` re-checks every row that passes
+        regex = re2_pattern(folded) if folding and flags & re.ASCII else None
         try:
-            target_keys.add(int(tid))
-        except Exception:
-            pass
-
-    if not vern_rows:
+            matched = spool_matches(iter_vern_candidates_arrow(args.vern, needles, regex))
+        except pa.ArrowInvalid as e:
+            print(f"WARN: pyarrow scan of {args.vern} failed ({e}); rescanning without it")
+            spool.seek(0)
+            spool.truncate()
+            target_keys.clear()
+    if matched is None:
+        matched = spool_matches(iter_vern_candidates(args.vern, needles))
+
+    if not matched:
+        spool.close()
         print("No vernacular matches found for pattern. Exiting.")
         return
 
-    print(f"Matched vernacular rows: {len(vern_rows)}  | distinct taxon keys: {len(target_keys)}")
-
-    # -------- 2) First pass over Taxon.tsv: find accepted keys for our targets --------
-    accepted_by_key: Dict[int, int] = {}         # key -> acceptedKey (if any)
-    rank_by_key: Dict[int, str] = {}             # key -> rank
-    status_by_key: Dict[int, str] = {}           # key -> taxonomicStatus (accepted/synonym/…)
-    name_by_key: Dict[int, Tuple[str, str]] = {} # key -> (canonicalName, scientificName)
-
-    print("Taxon.tsv pass 1: gathering accepted keys for matched taxon IDs…")
-    t_reader1 = open_tsv(args.taxon)
-    for row in t_reader1:
-        taxon_id = _get(row, "taxonKey", "taxonID", "taxonId", "usageKey", "usageID")
-        if not taxon_id:
-            continue
-        try:
-            k = int(taxon_id)
-        except Exception:
-            continue
-
-        if k not in target_keys:
-            continue
-
-        # record rank/status/names for fallback
-        rank_by_key[k] = (_get(row, "taxonRank", "rank") or "").lower()
-        status_by_key[k] = (_get(row, "taxonomicStatus", "status") or "").lower()
-        name_by_key[k] = (
-            (_get(row, "canonicalName") or "").strip(),
-            (_get(row, "scientificName") or "").strip()
-        )
+    print(f"Matched vernacular rows: {matched}  | distinct taxon keys: {len(target_keys)}")
 
-        acc = _get(row, "acceptedTaxonKey", "acceptedTaxonID", "acceptedNameUsageID", "acceptedNameUsageKey")
-        if acc:
-            try:
-                accepted_by_key[k] = int(acc)
-            except Exception:
-                pass
+    # -------- 2) Scan Taxon.tsv: targets + the accepted keys they point at --------
+    print("Taxon.tsv: gathering names/ranks for matched taxon IDs and their accepted keys…")
+    key_index = None if args.no_cache else taxon_key_index(args.taxon, build=args.cache, refresh=args.refresh_cache)
+    index = scan_taxon(args.taxon, target_keys, key_index)
+    idx_of = index.idx_of
 
-    accepted_keys = set(accepted_by_key.values())
+    accepted_keys = index.accepted_keys()
     all_needed_keys = set(target_keys) | accepted_keys
 
     print(f"Distinct accepted keys referenced: {len(accepted_keys)}  | total keys to resolve: {len(all_needed_keys)}")
 
-    # -------- 3) Second pass: resolve names for all needed keys --------
-    # Fill name_by_key, rank_by_key, status_by_key for accepted keys too
-    print("Taxon.tsv pass 2: resolving canonical/scientific names for all needed keys…")
-    t_reader2 = open_tsv(args.taxon)
-    for row in t_reader2:
-        taxon_id = _get(row, "taxonKey", "taxonID", "taxonId", "usageKey", "usageID")
-        if not taxon_id:
-            continue
-        try:
-            k = int(taxon_id)
-        except Exception:
-            continue
-        if k not in all_needed_keys:
-            continue
-
-        if k not in name_by_key:
-            name_by_key[k] = (
-                (_get(row, "canonicalName") or "").strip(),
-                (_get(row, "scientificName") or "").strip()
-            )
-        if k not in rank_by_key:
-            rank_by_key[k] = (_get(row, "taxonRank", "rank") or "").lower()
-        if k not in status_by_key:
-            status_by_key[k] = (_get(row, "taxonomicStatus", "status") or "").lower()
-
-    # -------- 4) Build output rows --------
-    out_rows: List[Dict[str, Any]] = []
-    for r in vern_rows:
-        key_s = r["taxonKey"]
-        try:
-            k = int(key_s)
-        except Exception:
-            k = None
-
-        accepted_key = accepted_by_key.get(k) if k is not None else None
-        # choose accepted canonicalName when possible, else the key’s canonical/scientific
-        if accepted_key and accepted_key in name_by_key:
-            can, sci = name_by_key[accepted_key]
-            chosen_key = accepted_key
-        else:
-            can, sci = name_by_key.get(k, ("", ""))
-            chosen_key = k
-
-        chosen_name = can or sci
-        chosen_rank = rank_by_key.get(chosen_key, "")
-        chosen_status = status_by_key.get(chosen_key, "")
-
-        if args.species_only and chosen_rank and (chosen_rank not in SPECIES_LIKE):
-            continue
-
-        out_rows.append({
-            "taxonKey": key_s,
-            "vernacularName": r["vernacularName"],
-            "language": r["language"],
-            "languageCode": r["languageCode"],
-            "countryCode": r["countryCode"],
-            "isPreferredName": r["isPreferredName"],
-            "resolvedScientificName": chosen_name,
-            "resolvedRank": chosen_rank,
-            "resolvedStatus": chosen_status,
-            "acceptedTaxonKey": str(accepted_key) if accepted_key is not None else "",
-        })
-
-    print(f"Writing {len(out_rows)} rows → {args.out}")
+    # -------- 4) Resolve and write output rows as we go --------
+    print(f"Writing → {args.out}")
+    total_rows = 0
+    species_rows = 0
     with open(args.out, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=[
+        w = csv.writer(f)
+        w.writerow([
             "taxonKey","vernacularName","language","languageCode","countryCode","isPreferredName",
             "resolvedScientificName","resolvedRank","resolvedStatus","acceptedTaxonKey"
         ])
-        w.writeheader()
-        w.writerows(out_rows)
+        spool.seek(0)
+        for key_s, vname, lang, lcode, country, pref in csv.reader(spool, delimiter="\t"):
+            try:
+                k = int(key_s)
+            except Exception:
+                k = None
+
+            accepted_key = index.accepted_of(k) if k is not None else None
+            # choose accepted canonicalName when possible, else the key’s canonical/scientific
+            i = idx_of.get(accepted_key) if accepted_key else None
+            if i is None:
+                i = idx_of.get(k)
+            if i is not None:
+                chosen_name = index.canonicals[i] or index.scinames[i]
+                chosen_rank = index.ranks[i]
+                chosen_status = index.statuses[i]
+            else:
+                chosen_name = chosen_rank = chosen_status = ""
+
+            if args.species_only and chosen_rank and (chosen_rank not in SPECIES_LIKE):
+                continue
+
+            w.writerow((
+                key_s,
+                vname,
+                lang,
+                lcode,
+                country,
+                pref,
+                chosen_name,
+                chosen_rank,
+                chosen_status,
+                str(accepted_key) if accepted_key is not None else "",
+            ))
+            total_rows += 1
+            if chosen_rank in SPECIES_LIKE:
+                species_rows += 1
+    spool.close()
 
     # quick summary
-    species_rows = sum(1 for r in out_rows if r["resolvedRank"] in SPECIES_LIKE)
-    print(f"Done. Species-like rows: {species_rows} / {len(out_rows)}")
+    print(f"Wrote {total_rows} rows.")
+    print(f"Done. Species-like rows: {species_rows} / {total_rows}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
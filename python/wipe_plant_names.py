@@ -12,18 +12,53 @@ Env:
   SUPABASE_SERVICE_ROLE   (service role key)
 
 Usage:
-  python wipe_plant_names.py [--batch 2000] [--dry-run]
+  python wipe_plant_names.py [--batch 2000] [--dry-run] [--paged | --single-shot]
+
+Without --dry-run/--paged, each batch is one call to the WIPE_RPC function below (no id
+fetch); if the RPC isn't available it falls back to keyset-paged updates. --single-shot
+wipes every row in one UPDATE via WIPE_ALL_RPC instead (falling back to batches); it
+holds row locks for the whole statement, so prefer batches on large, busy tables.
 """
 
 import os
 import sys
 import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+# One batch = one statement server-side; SKIP LOCKED keeps concurrent runs from colliding.
+# The partial index holds only rows still to wipe, so each batch starts at the first of
+# them instead of rescanning every row already wiped:
+#   create index if not exists plants_id_plant_name_set_idx on plants (id) where plant_name <> '';
+#   create or replace function wipe_plant_names_batch(n int) returns int
+#   language sql as $$
+#     with t as (
+#       select id from plants where plant_name <> '' order by id limit n
+#       for update skip locked
+#     ), u as (
+#       update plants p set plant_name = '' from t where p.id = t.id returning 1
+#     )
+#     select count(*)::int from u;
+#   $$;
+WIPE_RPC = os.getenv("WIPE_RPC", "wipe_plant_names_batch")
+
+# --single-shot: the whole wipe as one UPDATE, exempt from the API's statement timeout:
+#   create or replace function wipe_all_plant_names() returns int
+#   language plpgsql as $$
+#   declare n int;
+#   begin
+#     set local statement_timeout = 0;
+#     update plants set plant_name = '' where plant_name <> '';
+#     get diagnostics n = row_count;
+#     return n;
+#   end;
+#   $$;
+WIPE_ALL_RPC = os.getenv("WIPE_ALL_RPC", "wipe_all_plant_names")
+
 def get_sb() -> Client:
     load_dotenv()
     url = os.environ["SUPABASE_URL"]
@@ -48,20 +83,48 @@ def fetch_batch_ids(sb: Client, after_id: str | None, batch: int) -> List[str]:
     return [r["id"] for r in rows]
 
 def wipe_batch(sb: Client, ids: List[str], dry_run: bool = False) -> int:
+    """
+    Wipe one keyset page, addressed by its id bounds plus the filter that selected it, so
+    the request is constant-size instead of a 2000-id IN list. returning="minimal" skips
+    serializing the updated rows back.
+    """
     if not ids:
         return 0
     if dry_run:
         return len(ids)
     # Let your BEFORE UPDATE trigger set updated_at
-    sb.table("plants").update({"plant_name": ""}).in_("id", ids).execute()
+    (
+        sb.table("plants")
+        .update({"plant_name": ""}, returning="minimal")
+        .neq("plant_name", "")
+        .gte("id", ids[0])
+        .lte("id", ids[-1])
+        .execute()
+    )
     return len(ids)
 
+def wipe_batch_rpc(sb: Client, n: int) -> int:
+    """Wipe up to n rows server-side; returns rows wiped."""
+    res = sb.rpc(WIPE_RPC, {"n": n}).execute()
+    return int(getattr(res, "data", None) or 0)
+
+def wipe_all_rpc(sb: Client) -> int:
+    """Wipe every row in a single server-side UPDATE; returns rows wiped."""
+    res = sb.rpc(WIPE_ALL_RPC, {}).execute()
+    return int(getattr(res, "data", None) or 0)
+
+PROGRESS_EVERY = 0.1  # seconds between progress-line redraws
+
 def main():
     ap = argparse.ArgumentParser(description="Wipe plant_name in batches to avoid timeouts.")
     ap.add_argument("--batch", type=int, default=2000, help="Rows per batch (default: 2000)")
     ap.add_argument("--dry-run", action="store_true", help="Scan & count, but do not update")
     ap.add_argument("--sleep", type=float, default=0.05, help="Sleep seconds between batches")
+    ap.add_argument("--paged", action="store_true", help=f"Fetch ids and update by id instead of calling {WIPE_RPC}")
+    ap.add_argument("--single-shot", action="store_true", help=f"Wipe everything in one call to {WIPE_ALL_RPC}")
     args = ap.parse_args()
+    if args.single_shot and (args.dry_run or args.paged):
+        ap.error("--single-shot can't be combined with --dry-run or --paged")
 
     sb = get_sb()
 
@@ -69,27 +132,75 @@ def main():
     batches = 0
     cursor = None
     started = time.time()
-
-    while True:
-        ids = fetch_batch_ids(sb, cursor, args.batch)
-        if not ids:
+    last_progress = 0.0
+
+    def progress(line: str, final: bool = False) -> None:
+        # one write+flush per PROGRESS_EVERY at most; small batches would otherwise redraw per call
+        nonlocal last_progress
+        now = time.monotonic()
+        if final or now - last_progress >= PROGRESS_EVERY:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            last_progress = now
+
+    if args.single_shot:
+        try:
+            total = wipe_all_rpc(sb)
+        except Exception as e:
+            print(f"WARN: {WIPE_ALL_RPC} RPC failed ({e}); falling back to batches.")
+        else:
+            dur = time.time() - started
+            print(f"Done. Total rows wiped: {total:,} in {dur:.1f}s (rpc={WIPE_ALL_RPC}).")
+            return
+
+    use_rpc = not args.dry_run and not args.paged
+    while use_rpc:
+        try:
+            n = wipe_batch_rpc(sb, args.batch)
+        except Exception as e:
+            print(f"WARN: {WIPE_RPC} RPC failed ({e}); falling back to paged updates.")
             break
-
-        # advance cursor using the last id in the ordered batch
-        cursor = ids[-1]
-
-        n = wipe_batch(sb, ids, dry_run=args.dry_run)
         total += n
         batches += 1
-
-        # progress line
-        sys.stdout.write(f"\rBatches: {batches:,}  last_id: {cursor}  wiped_this_batch: {n:,}  total_wiped: {total:,}")
-        sys.stdout.flush()
-
-        # small pause to be gentle on the API
+        # a short batch may only mean SKIP LOCKED passed over rows; stop when none are left
+        done = n == 0
+        progress(f"\rBatches: {batches:,}  wiped_this_batch: {n:,}  total_wiped: {total:,}", final=done)
+        if done:
+            dur = time.time() - started
+            print(f"\nDone. Total rows wiped: {total:,} in {dur:.1f}s (batch={args.batch}, rpc={WIPE_RPC}).")
+            return
         if args.sleep:
             time.sleep(args.sleep)
 
+    # The next page's ids are fetched (on its own client) while this page's update runs;
+    # the cursor only moves forward, so the update can't change what the next fetch sees.
+    fetch_sb = get_sb()
+    line = ""
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        next_ids = ex.submit(fetch_batch_ids, fetch_sb, cursor, args.batch)
+        while True:
+            ids = next_ids.result()
+            if not ids:
+                if line:
+                    progress(line, final=True)
+                break
+
+            # advance cursor using the last id in the ordered batch
+            cursor = ids[-1]
+            next_ids = ex.submit(fetch_batch_ids, fetch_sb, cursor, args.batch)
+
+            n = wipe_batch(sb, ids, dry_run=args.dry_run)
+            total += n
+            batches += 1
+
+            # progress line
+            line = f"\rBatches: {batches:,}  last_id: {cursor}  wiped_this_batch: {n:,}  total_wiped: {total:,}"
+            progress(line)
+
+            # small pause to be gentle on the API
+            if args.sleep:
+                time.sleep(args.sleep)
+
     dur = time.time() - started
     print(f"\nDone. Total rows {'to wipe' if args.dry_run else 'wiped'}: {total:,} in {dur:.1f}s (batch={args.batch}).")
 